@@ -0,0 +1,226 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+RISK_PATH = "cleaned_data/exposures_risk.csv"
+GRID_PATH = "cleaned_data/accumulation_grid.csv"
+RINGS_PATH = "cleaned_data/accumulation_rings.csv"
+
+# Cell sizes in degrees, coarse to fine; each divides the previous one.
+RESOLUTIONS = (5.0, 1.0, 0.25)
+RING_RADII_KM = (10.0, 50.0, 100.0)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON_EQUATOR = 111.320
+# Candidate (centre, neighbour) pairs per ring_sums block; bounds memory as the portfolio grows.
+RING_BLOCK_PAIRS = 2_000_000
+
+
+def latest_policy_year(df_exposures: pd.DataFrame) -> pd.DataFrame:
+    """One row per location: the current portfolio used for accumulation."""
+    return df_exposures[df_exposures["PolicyYear"] == df_exposures["PolicyYear"].max()]
+
+
+def _at_risk_tiv(df: pd.DataFrame) -> np.ndarray:
+    tiv = df["TotalInsuredValue"].to_numpy(dtype=float)
+    if "is_at_risk" not in df.columns:
+        return np.zeros_like(tiv)
+    return np.where(df["is_at_risk"].to_numpy(dtype=bool), tiv, 0.0)
+
+
+def grid_cells(df: pd.DataFrame, resolution: float) -> pd.DataFrame:
+    """TIV, premium and at-risk TIV summed per lat/lon cell of one resolution."""
+    lat_idx = np.floor(df["Latitude"].to_numpy(dtype=float) / resolution).astype(np.int64)
+    lon_idx = np.floor(df["Longitude"].to_numpy(dtype=float) / resolution).astype(np.int64)
+    codes, cells = pd.factorize(pd.MultiIndex.from_arrays([lat_idx, lon_idx]), sort=True)
+    n = len(cells)
+
+    cell_lat = cells.get_level_values(0).to_numpy()
+    cell_lon = cells.get_level_values(1).to_numpy()
+    return pd.DataFrame({
+        "resolution": resolution,
+        "lat_idx": cell_lat,
+        "lon_idx": cell_lon,
+        "lat_min": cell_lat * resolution,
+        "lon_min": cell_lon * resolution,
+        "Locations": np.bincount(codes, minlength=n),
+        "TIV": np.bincount(codes, weights=df["TotalInsuredValue"].to_numpy(dtype=float), minlength=n),
+        "Premium": np.bincount(codes, weights=df["Premium"].to_numpy(dtype=float), minlength=n),
+        "AtRiskTIV": np.bincount(codes, weights=_at_risk_tiv(df), minlength=n),
+    })
+
+
+def build_grid(df: pd.DataFrame, resolutions=RESOLUTIONS) -> pd.DataFrame:
+    """All resolutions stacked; each cell also carries its parent cell at the next coarser level."""
+    levels = [grid_cells(df, res) for res in resolutions]
+    for res, fine in zip(resolutions, levels[1:]):
+        centre_lat = fine["lat_min"] + fine["resolution"] / 2
+        centre_lon = fine["lon_min"] + fine["resolution"] / 2
+        fine["parent_lat_idx"] = np.floor(centre_lat / res).astype("Int64")
+        fine["parent_lon_idx"] = np.floor(centre_lon / res).astype("Int64")
+    return pd.concat(levels, ignore_index=True)
+
+
+def top_cells(df_grid: pd.DataFrame, resolution: float, n: int = 10, by: str = "TIV") -> pd.DataFrame:
+    """The `n` most concentrated cells at one resolution."""
+    return df_grid[df_grid["resolution"] == resolution].nlargest(n, by).reset_index(drop=True)
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class RingIndex:
+    """
+    Points bucketed into cells at least `radius_km` wide, so every point within
+    the radius of a centre lies in the 3x3 block of cells around it.
+    """
+
+    def __init__(self, lat, lon, weights: dict, radius_km: float):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.weights = {k: np.asarray(v, dtype=float) for k, v in weights.items()}
+        self.radius_km = radius_km
+
+        max_abs_lat = min(np.abs(self.lat).max() + radius_km / KM_PER_DEG_LAT, 89.0) if len(self.lat) else 0.0
+        self.cell_lat = radius_km / KM_PER_DEG_LAT
+        self.cell_lon = radius_km / (KM_PER_DEG_LON_EQUATOR * np.cos(np.radians(max_abs_lat)))
+        keys = self._keys(self.lat, self.lon)
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    def _cell(self, lat, lon):
+        return (np.floor(np.asarray(lat) / self.cell_lat).astype(np.int64),
+                np.floor(np.asarray(lon) / self.cell_lon).astype(np.int64))
+
+    @staticmethod
+    def _combine(i, j):
+        # Longitude cell indices stay inside +-2**20 for any radius above ~0.2 km.
+        return i * (1 << 21) + (j + (1 << 20))
+
+    def _keys(self, lat, lon):
+        return self._combine(*self._cell(lat, lon))
+
+    def _neighbour_ranges(self, lat, lon):
+        """[lo, hi) slices of the sorted points in each centre's 3x3 cells, one pair of arrays per cell offset."""
+        ci, cj = self._cell(lat, lon)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                target = self._combine(ci + di, cj + dj)
+                yield (np.searchsorted(self.sorted_keys, target, side="left"),
+                       np.searchsorted(self.sorted_keys, target, side="right"))
+
+    def ring_sums(self, lat, lon) -> pd.DataFrame:
+        """
+        Sum every weight within `radius_km` of each centre. Vectorized over blocks
+        of centres holding at most RING_BLOCK_PAIRS candidate pairs, so memory
+        stays flat however many centres are passed.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        pairs = np.cumsum(sum(hi - lo for lo, hi in self._neighbour_ranges(lat, lon)))
+        sums = {name: np.zeros(len(lat)) for name in self.weights}
+        start = 0
+        while start < len(lat):
+            done = pairs[start - 1] if start else 0
+            end = max(int(np.searchsorted(pairs, done + RING_BLOCK_PAIRS, side="right")), start + 1)
+            for name, block_sums in self._block_sums(lat[start:end], lon[start:end]).items():
+                sums[name][start:end] += block_sums
+            start = end
+        return pd.DataFrame(sums)
+
+    def _block_sums(self, lat, lon) -> dict:
+        centres, members = [], []
+        for lo, hi in self._neighbour_ranges(lat, lon):
+            counts = hi - lo
+            centre = np.repeat(np.arange(len(lat)), counts)
+            offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            centres.append(centre)
+            members.append(self.order[np.repeat(lo, counts) + offset])
+        centre = np.concatenate(centres)
+        member = np.concatenate(members)
+
+        inside = _haversine_km(lat[centre], lon[centre], self.lat[member], self.lon[member]) <= self.radius_km
+        centre, member = centre[inside], member[inside]
+        return {
+            name: np.bincount(centre, weights=w[member], minlength=len(lat))
+            for name, w in self.weights.items()
+        }
+
+
+def _ring_weights(df: pd.DataFrame) -> dict:
+    return {
+        "TIV": df["TotalInsuredValue"].to_numpy(dtype=float),
+        "Premium": df["Premium"].to_numpy(dtype=float),
+        "AtRiskTIV": _at_risk_tiv(df),
+    }
+
+
+def worst_rings(df: pd.DataFrame, radii_km=RING_RADII_KM, by: str = "TIV") -> pd.DataFrame:
+    """For each radius, the location-centred ring holding the most TIV."""
+    rows = []
+    if not len(df):
+        return pd.DataFrame(rows)
+    for radius in radii_km:
+        index = RingIndex(df["Latitude"], df["Longitude"], _ring_weights(df), radius)
+        sums = index.ring_sums(df["Latitude"], df["Longitude"])
+        best = int(np.argmax(sums[by].to_numpy()))
+        rows.append({
+            "radius_km": radius,
+            "centre_Location": df["Location"].iloc[best],
+            "centre_lat": df["Latitude"].iloc[best],
+            "centre_lon": df["Longitude"].iloc[best],
+            **sums.iloc[best].to_dict(),
+        })
+    return pd.DataFrame(rows)
+
+
+def ring_index(df: pd.DataFrame, radius_km: float) -> RingIndex:
+    """Ring index over `df`; build one per radius and pass every centre to a single `ring_sums` call."""
+    return RingIndex(df["Latitude"], df["Longitude"], _ring_weights(df), radius_km)
+
+
+def ring_around(df: pd.DataFrame, lat: float, lon: float, radius_km: float) -> dict:
+    """TIV / premium / at-risk TIV within `radius_km` of an arbitrary point."""
+    return ring_index(df, radius_km).ring_sums(lat, lon).iloc[0].to_dict()
+
+
+def build_accumulation(df_exposures_risk: pd.DataFrame):
+    df_current = latest_policy_year(df_exposures_risk)
+    return build_grid(df_current), worst_rings(df_current)
+
+
+def save_accumulation(df_grid: pd.DataFrame, df_rings: pd.DataFrame):
+    df_grid.to_csv(GRID_PATH, index=False)
+    df_rings.to_csv(RINGS_PATH, index=False)
+
+
+def load_or_build_accumulation():
+    """Cached grid/ring tables, rebuilt only when exposures_risk.csv is newer than the cache."""
+    cache_fresh = all(
+        os.path.exists(p) and os.path.getmtime(p) >= os.path.getmtime(RISK_PATH)
+        for p in (GRID_PATH, RINGS_PATH)
+    )
+    if cache_fresh:
+        return pd.read_csv(GRID_PATH), pd.read_csv(RINGS_PATH)
+    df_grid, df_rings = build_accumulation(pd.read_csv(RISK_PATH))
+    save_accumulation(df_grid, df_rings)
+    return df_grid, df_rings
+
+
+def main():
+    df_grid, df_rings = build_accumulation(pd.read_csv(RISK_PATH))
+    save_accumulation(df_grid, df_rings)
+    for res in RESOLUTIONS:
+        print(f"\n=== Top 10 cells by TIV ({res}° grid) ===")
+        print(top_cells(df_grid, res))
+    print("\n=== Worst rings ===")
+    print(df_rings)
+
+
+if __name__ == "__main__":
+    main()
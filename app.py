@@ -1,25 +1,81 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import altair as alt
 
-def load_data():
-    """
-    Loads the cleaned exposures, hurricane,
-    and any needed merges. Adjust paths as required.
-    """
-    df_exposures = pd.read_csv("cleaned_data/exposures_cleaned.csv")
+from accumulation import RESOLUTIONS, RISK_PATH, latest_policy_year, load_or_build_accumulation, ring_index, top_cells
+from dashboard_data import SOURCE_FILES, filter_exposures, filter_hurricanes, filter_risk, load_data, year_filter
+from distance_index import (
+    MAX_RADIUS_DEGREES, PML_TIV_HIGH, PML_TIV_MEDIUM, PML_WIND_HIGH, PML_WIND_MEDIUM, load_or_build_index, what_if
+)
+from impact_matrix import IMPACT_MATRIX_PATH, ImpactMatrix
+from loss_experience import load_or_build_experience
+from risk_engine import RiskJob
+
+# Finished recomputes kept per data version; the oldest is dropped beyond this.
+MAX_RISK_JOBS = 16
+
+@st.cache_resource
+def get_risk_executor():
+    """Worker pool shared by every session for background risk recomputes."""
+    return ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+
+
+@st.cache_resource
+def get_distance_index():
+    """Per-location distance index behind the what-if sliders, loaded once per server."""
+    return load_or_build_index()
+
+
+@st.cache_resource
+def get_loss_experience():
+    """Per-location cumulative TIV / premium / loss arrays, loaded once per server."""
+    return load_or_build_experience()
+
+
+def file_mtimes(paths) -> tuple:
+    """Cache key that changes whenever one of `paths` is rewritten."""
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
 
-    df_hurr = pd.read_csv("cleaned_data/hurr2_merged_with_h1_wind.csv")
 
-    df_exposures_risk = pd.read_csv("cleaned_data/exposures_risk.csv")
+@st.cache_data
+def get_data(mtimes):
+    """load_data() once per version of its source files, not on every rerun (e.g. while polling)."""
+    return load_data()
 
-    return df_exposures, df_hurr, df_exposures_risk
+
+@st.cache_data
+def get_impact_matrix(mtimes):
+    return ImpactMatrix.load(IMPACT_MATRIX_PATH)
+
+
+@st.cache_data
+def get_accumulation(mtimes):
+    """Grid / worst-ring tables, re-read only when exposures_risk.csv changes."""
+    return load_or_build_accumulation()
+
+
+@st.cache_resource(max_entries=8)
+def get_ring_index(radius_km, mtimes):
+    """Ring index over the latest policy year, built once per radius and version of the data (last 8 kept)."""
+    df_exposures_risk = get_data(mtimes)[2]
+    return ring_index(latest_policy_year(df_exposures_risk), radius_km)
+
+
+@st.cache_resource
+def get_risk_jobs():
+    """Recompute jobs keyed by (data version, storms, years), so a selection is computed once per version of the data."""
+    return {}
 
 def main():
     st.title("Dynamic Underwriting Report")
 
-    df_exposures, df_hurr, df_exposures_risk = load_data()
+    data_version = file_mtimes(SOURCE_FILES)
+    df_exposures, df_hurr, df_exposures_risk, hurr_index = get_data(data_version)
 
     st.sidebar.header("Filters")
 
@@ -37,33 +93,21 @@ def main():
         default=all_storms[:5]
     )
 
-    if "year" in df_hurr.columns:
-        years_all = sorted(df_hurr["year"].unique())
-        year_selected = st.sidebar.multiselect(
-            "Choose Hurricane Year(s):",
-            options=years_all,
-            default=years_all  # select all by default
-        )
-    else:
-        year_selected = []
+    years_all = hurr_index.years().tolist()
+    year_selected = st.sidebar.multiselect(
+        "Choose Hurricane Year(s):",
+        options=years_all,
+        default=years_all  # select all by default
+    )
 
     x_years = st.sidebar.number_input(
         "Past X Years of Policy Results:", min_value=1, max_value=50, value=5
     )
 
 
-    df_expos_filtered = df_exposures[df_exposures["Location"].isin(loc_selected)].copy()
-
-    if len(df_expos_filtered) > 0:
-        max_pol_year = df_expos_filtered["PolicyYear"].max()
-        min_pol_year = max_pol_year - x_years + 1
-        df_expos_filtered = df_expos_filtered[df_expos_filtered["PolicyYear"] >= min_pol_year]
+    df_expos_filtered, min_pol_year = filter_exposures(df_exposures, loc_selected, x_years)
 
-    df_hurr_filtered = df_hurr[df_hurr["storm_name"].isin(storm_selected)].copy()
-
-    # Filter Hurricanes by year if relevant
-    if "year" in df_hurr.columns and len(year_selected) > 0:
-        df_hurr_filtered = df_hurr_filtered[df_hurr_filtered["year"].isin(year_selected)]
+    df_hurr_filtered = filter_hurricanes(df_hurr, hurr_index, storm_selected, year_selected)
 
 
     # --- Exposures Summary ---
@@ -73,6 +117,18 @@ def main():
         total_tiv = df_expos_filtered["TotalInsuredValue"].sum()
         st.write(f"**Total Insured Value**: {total_tiv:,.2f}")
 
+    # --- Account Loss Experience ---
+    st.subheader(f"Account Loss Experience (Past {x_years} Years)")
+    if len(loc_selected) > 0:
+        experience = get_loss_experience()
+        account = experience.totals(loc_selected, x_years)
+        st.write(
+            f"**Premium**: {account['Premium']:,.2f} | **Non-Cat Loss**: {account['NonCatLoss']:,.2f} | "
+            f"**Loss Ratio**: {account['LossRatio']:.2%} | **Loss Cost**: {account['LossCost']:.4%} | "
+            f"**Premium per $100 TIV**: {account['Premium_per_100_TIV']:.3f}"
+        )
+        st.write(experience.by_location(loc_selected, x_years))
+
     # --- Hurricane Summary ---
     st.subheader("Filtered Hurricanes Summary")
     st.write(f"Storms: {storm_selected} | Years: {year_selected if year_selected else 'All Available'}")
@@ -106,13 +162,108 @@ def main():
         st.write("No latitude/longitude to display in Exposures.")
 
     st.subheader("Risk & Hurricanes Info")
-    df_risk_filtered = df_exposures_risk[df_exposures_risk["Location"].isin(loc_selected)].copy()
+    df_risk_filtered = filter_risk(df_exposures_risk, loc_selected, min_pol_year)
     if len(df_risk_filtered) > 0:
-        if "PolicyYear" in df_risk_filtered.columns:
-            df_risk_filtered = df_risk_filtered[df_risk_filtered["PolicyYear"] >= min_pol_year]
         at_risk_count = df_risk_filtered["is_at_risk"].sum()
         st.write(f"**At-Risk Count** among selected: {at_risk_count} / {len(df_risk_filtered)}")
         st.write(df_risk_filtered.head(10))
 
+    if os.path.exists(IMPACT_MATRIX_PATH):
+        impact = get_impact_matrix(file_mtimes([IMPACT_MATRIX_PATH]))
+        st.write("**Storms affecting selected locations** (max wind at location):")
+        df_loc_storms = pd.concat(
+            [impact.storms_for_location(loc).assign(Location=loc) for loc in loc_selected],
+            ignore_index=True,
+        ) if loc_selected else pd.DataFrame()
+        st.write(df_loc_storms)
+
+    st.subheader("TIV Accumulation by Grid Cell")
+    df_grid, df_rings = get_accumulation(file_mtimes([RISK_PATH]))
+    resolution = st.selectbox("Grid resolution (degrees):", options=RESOLUTIONS, index=1)
+    st.write(top_cells(df_grid, resolution))
+    st.write("**Worst rings** (location-centred, latest policy year):")
+    st.write(df_rings)
+    if len(df_expos_filtered) > 0:
+        ring_radius = st.number_input("Ring radius around selected locations (km):", min_value=1.0, value=50.0)
+        df_current = latest_policy_year(df_exposures_risk)
+        df_sel = df_current[df_current["Location"].isin(loc_selected)]
+        rings = get_ring_index(ring_radius, data_version)
+        df_ring_sel = rings.ring_sums(df_sel["Latitude"], df_sel["Longitude"])
+        df_ring_sel.insert(0, "Location", df_sel["Location"].to_numpy())
+        st.write(df_ring_sel)
+
+    st.subheader("Recompute Risk for Selected Storms")
+    risk_jobs = get_risk_jobs()
+    # Jobs computed from an older version of the CSVs are stale.
+    for key in [k for k in risk_jobs if k[0] != data_version]:
+        risk_jobs.pop(key).cancel()
+    # Keyed by what filter_hurricanes actually applies, so e.g. no years and all years share a job.
+    job_key = (data_version, tuple(sorted(set(storm_selected))), year_filter(hurr_index, year_selected))
+    if st.button("Recompute Risk") and job_key not in risk_jobs:
+        risk_jobs[job_key] = RiskJob(get_risk_executor(), df_exposures, df_hurr_filtered, source_rows=True)
+        while len(risk_jobs) > MAX_RISK_JOBS:
+            risk_jobs.pop(next(iter(risk_jobs))).cancel()
+    job = risk_jobs.get(job_key)
+    job_pending = job is not None and not job.done()
+    if job is None:
+        st.write("Risk above is precomputed over all storms; recompute to use the current storm selection.")
+    elif job_pending:
+        st.progress(job.progress(), text="Recomputing risk in the background...")
+    else:
+        try:
+            df_risk_new, impact_new = job.result()
+        except Exception as e:
+            # Drop the failed job so the button can submit this selection again.
+            risk_jobs.pop(job_key, None)
+            st.error(f"Risk recompute failed: {e}")
+        else:
+            df_loc_storm_new = impact_new.to_frame()
+            df_risk_new = df_risk_new[df_risk_new["Location"].isin(loc_selected)]
+            tiv_at_risk_new = df_risk_new.loc[df_risk_new["is_at_risk"], "TotalInsuredValue"].sum()
+            st.write(f"**At-Risk TIV** for selected storms: {tiv_at_risk_new:,.2f}")
+            st.write(df_loc_storm_new[df_loc_storm_new["Location"].isin(loc_selected)])
+
+    st.subheader("What-If: At-Risk Radius & PML Thresholds")
+    distance_index = get_distance_index()
+    radius = st.slider("At-risk radius (degrees):", min_value=0.1, max_value=MAX_RADIUS_DEGREES, value=1.0, step=0.1)
+    wind_medium, wind_high = st.slider("Wind thresholds, Medium / High (kt):", min_value=0, max_value=150,
+                                       value=(PML_WIND_MEDIUM, PML_WIND_HIGH))
+    tiv_medium, tiv_high = st.slider("TIV thresholds, Medium / High:", min_value=0, max_value=2_000_000,
+                                     value=(PML_TIV_MEDIUM, PML_TIV_HIGH), step=10_000)
+    tiv_at_risk_wi, tiv_total_wi, df_pml_wi = what_if(
+        df_exposures, distance_index, radius,
+        tiv_high=tiv_high, tiv_medium=tiv_medium, wind_high=wind_high, wind_medium=wind_medium,
+    )
+    st.write(f"**At-Risk TIV** (all locations, all policy years): {tiv_at_risk_wi:,.2f} "
+             f"/ {tiv_total_wi:,.2f} ({tiv_at_risk_wi / tiv_total_wi:.2%})")
+    st.write(df_pml_wi)
+
+    st.subheader("Return-Period PML (Exceedance Curves)")
+    if os.path.exists("cleaned_data/pml_return_periods.csv"):
+        df_pml_rp = pd.read_csv("cleaned_data/pml_return_periods.csv")
+        df_ep = pd.read_csv("cleaned_data/ep_curves.csv")
+        n_record = int(df_ep["rank"].max())
+        if "method" in df_pml_rp.columns and (df_pml_rp["method"] == "record_too_short").any():
+            st.warning(f"The {n_record}-year storm record is too short to estimate the longer return periods.")
+            df_pml_rp = df_pml_rp[df_pml_rp["method"] != "record_too_short"]
+        if df_pml_rp["beyond_record"].any():
+            st.write(f"Return periods beyond the {n_record}-year record are extrapolated from a "
+                     "log-linear fit to the tail of the curve (`method = tail_fit`), not observed.")
+        st.write(df_pml_rp)
+        ep_chart = alt.Chart(df_ep).mark_line(point=True).encode(
+            x=alt.X("return_period:Q", scale=alt.Scale(type="log"), title="Return Period (years)"),
+            y=alt.Y("loss:Q", title="Loss"),
+            color="curve:N",
+            tooltip=["curve", "return_period", "loss", "exceedance_prob"]
+        ).properties(width=600, height=400)
+        st.altair_chart(ep_chart, use_container_width=True)
+    else:
+        st.write("Run `python exceedance_curves.py` to generate OEP/AEP curves.")
+
+    # Poll the running recompute; any widget change interrupts this and reruns immediately.
+    if job_pending:
+        time.sleep(0.5)
+        st.rerun()
+
 if __name__ == "__main__":
     main()
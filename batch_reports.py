@@ -0,0 +1,152 @@
+import argparse
+import base64
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from dashboard_data import SOURCE_FILES, filter_exposures, filter_hurricanes, filter_risk, load_data
+
+REPORT_DIR = "reports"
+CHART_CACHE = ".chart_cache"
+
+# Loaded once per worker process by init_worker().
+_DATA = None
+_SOURCE_STAMP = None
+
+
+def _source_stamp() -> list:
+    # Size/mtime of the files load_data() reads; part of every chart cache key.
+    return [[path, os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in SOURCE_FILES]
+
+
+def init_worker():
+    global _DATA, _SOURCE_STAMP
+    _SOURCE_STAMP = _source_stamp()
+    _DATA = load_data()
+
+
+def _cached_png(out_dir: str, kind: str, key, render) -> str:
+    """
+    Base64 PNG for a chart, rendered at most once per identical sub-selection:
+    charts are stored under a hash of (kind, key, source files), shared by every
+    worker, so regenerated CSVs never reuse charts drawn from the old ones.
+    """
+    digest = hashlib.sha1(json.dumps([kind, key, _SOURCE_STAMP], default=str).encode("utf-8")).hexdigest()
+    path = os.path.join(out_dir, CHART_CACHE, f"{kind}_{digest}.png")
+    if not os.path.exists(path):
+        fig = render()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fig.savefig(tmp_path, format="png", dpi=100, bbox_inches="tight")
+        plt.close(fig)
+        os.replace(tmp_path, path)
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode("ascii")
+
+
+def tiv_by_year_chart(df_expos_filtered):
+    chart_data = df_expos_filtered.groupby("PolicyYear")["TotalInsuredValue"].sum()
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.bar(chart_data.index.astype(str), chart_data.values)
+    ax.set_title("TIV by Policy Year")
+    ax.set_xlabel("Policy Year")
+    ax.set_ylabel("Total Insured Value")
+    ax.tick_params(axis="x", rotation=45)
+    return fig
+
+
+def location_map_chart(df_expos_filtered, df_hurr_filtered):
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.scatter(df_hurr_filtered["HurLon"], df_hurr_filtered["HurLat"], s=4, c="blue", alpha=0.3, label="Storm track points")
+    df_loc = df_expos_filtered.drop_duplicates("Location")
+    ax.scatter(df_loc["Longitude"], df_loc["Latitude"], s=40, c="red", label="Locations")
+    ax.set_title("Selected Locations & Storm Tracks")
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    ax.legend()
+    return fig
+
+
+def render_report(selection: dict, out_dir: str = REPORT_DIR) -> str:
+    """Render one self-contained HTML report (the app.py view for one selection); returns its path."""
+    df_exposures, df_hurr, df_exposures_risk, hurr_index = _DATA
+
+    loc_selected = sorted(selection.get("locations", []))
+    storm_selected = sorted(selection.get("storms", []))
+    year_selected = sorted(selection.get("years", []))
+    x_years = int(selection.get("x_years", 5))
+    name = selection.get("name") or "_".join(map(str, loc_selected)) or "report"
+
+    df_expos_filtered, min_pol_year = filter_exposures(df_exposures, loc_selected, x_years)
+    df_hurr_filtered = filter_hurricanes(df_hurr, hurr_index, storm_selected, year_selected)
+    df_risk_filtered = filter_risk(df_exposures_risk, loc_selected, min_pol_year)
+
+    sections = [f"<h1>Underwriting Report: {html.escape(str(name))}</h1>"]
+
+    sections.append("<h2>Filtered Exposures Summary</h2>")
+    sections.append(f"<p>Locations: {loc_selected} | Past {x_years} Years | Rows: {len(df_expos_filtered)}</p>")
+    if len(df_expos_filtered) > 0:
+        total_tiv = df_expos_filtered["TotalInsuredValue"].sum()
+        sections.append(f"<p><b>Total Insured Value</b>: {total_tiv:,.2f}</p>")
+
+    sections.append("<h2>Filtered Hurricanes Summary</h2>")
+    sections.append(f"<p>Storms: {html.escape(str(storm_selected))} | "
+                    f"Years: {year_selected if year_selected else 'All Available'} | Rows: {len(df_hurr_filtered)}</p>")
+    if len(df_hurr_filtered) > 0:
+        sections.append(f"<p><b>Max Wind Speed</b> among chosen storms: {df_hurr_filtered['wind_speed'].max()} kt</p>")
+
+    if len(df_expos_filtered) > 0:
+        tiv_png = _cached_png(out_dir, "tiv_by_year", [loc_selected, x_years],
+                              lambda: tiv_by_year_chart(df_expos_filtered))
+        sections.append("<h2>Exposures Over Years</h2>")
+        sections.append(f'<img src="data:image/png;base64,{tiv_png}">')
+
+        map_png = _cached_png(out_dir, "map", [loc_selected, x_years, storm_selected, year_selected],
+                              lambda: location_map_chart(df_expos_filtered, df_hurr_filtered))
+        sections.append("<h2>Map of Selected Locations</h2>")
+        sections.append(f'<img src="data:image/png;base64,{map_png}">')
+
+    sections.append("<h2>Risk & Hurricanes Info</h2>")
+    if len(df_risk_filtered) > 0:
+        at_risk_count = df_risk_filtered["is_at_risk"].sum()
+        sections.append(f"<p><b>At-Risk Count</b> among selected: {at_risk_count} / {len(df_risk_filtered)}</p>")
+        sections.append(df_risk_filtered.to_html(index=False))
+
+    safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(name))
+    path = os.path.join(out_dir, f"{safe_name}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html><head><meta charset='utf-8'>"
+                f"<title>{html.escape(str(name))}</title></head><body>")
+        f.write("\n".join(sections))
+        f.write("</body></html>")
+    return path
+
+
+def render_reports(selections: list, out_dir: str = REPORT_DIR, workers: int = None) -> list:
+    """Render every selection across a process pool; each worker loads the datasets once."""
+    os.makedirs(os.path.join(out_dir, CHART_CACHE), exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        return list(pool.map(render_report, selections, [out_dir] * len(selections),
+                             chunksize=max(1, len(selections) // (4 * (workers or os.cpu_count() or 1)))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-export static underwriting reports.")
+    parser.add_argument("selections", help='JSON list of {"name", "locations", "storms", "years", "x_years"}')
+    parser.add_argument("--out", default=REPORT_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.selections, encoding="utf-8") as f:
+        selections = json.load(f)
+    paths = render_reports(selections, args.out, args.workers)
+    print(f"Wrote {len(paths)} reports to {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,22 @@
+import argparse
+import os
+
 import pandas as pd
 import numpy as np
 
+RENAME_DICT = {
+    "Location": "Location",
+    "Latitude": "Latitude",
+    "Longitude": "Longitude",
+    "Total Insured Value": "TotalInsuredValue",
+    "Premium": "Premium",
+    "Losses - Non Catastrophe": "NonCatLoss",
+    "PolicyYear": "PolicyYear"
+}
+MONEY_COLS = ["TotalInsuredValue", "Premium", "NonCatLoss"]
+INT_COLS = ["Location", "PolicyYear"]
+CHUNK_ROWS = 100_000
+
 
 def main():
     """
@@ -27,19 +43,10 @@ def main():
     df_exposures.drop_duplicates(inplace=True)
 
     # 3. 重命名列以避免空格或奇怪字符
-    rename_dict = {
-        "Location": "Location",
-        "Latitude": "Latitude",
-        "Longitude": "Longitude",
-        "Total Insured Value": "TotalInsuredValue",
-        "Premium": "Premium",
-        "Losses - Non Catastrophe": "NonCatLoss",
-        "PolicyYear": "PolicyYear"
-    }
-    df_exposures.rename(columns=rename_dict, inplace=True)
+    df_exposures.rename(columns=RENAME_DICT, inplace=True)
 
     # 4. 转换数据类型
-    for col in ["TotalInsuredValue", "Premium", "NonCatLoss"]:
+    for col in MONEY_COLS:
         df_exposures[col] = (
             df_exposures[col]
             .astype(str)
@@ -62,5 +69,171 @@ def main():
     print(f"\n清洗后的 Exposures 已保存到: {output_path}")
 
 
+class RowHashSet:
+    """Sorted uint64 row hashes seen so far; 8 bytes per distinct row."""
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def add_new(self, hashes: np.ndarray) -> np.ndarray:
+        """Mark rows whose hash was not seen before (first occurrence wins) and remember them."""
+        first_in_chunk = ~pd.Series(hashes).duplicated().to_numpy()
+        pos = np.searchsorted(self.hashes, hashes)
+        seen = pos < len(self.hashes)
+        seen[seen] = self.hashes[pos[seen]] == hashes[seen]
+        is_new = first_in_chunk & ~seen
+        # Both inputs are sorted runs, which the stable sort merges in linear time.
+        self.hashes = np.sort(np.concatenate([self.hashes, np.sort(hashes[is_new])]), kind="stable")
+        return is_new
+
+
+def _excel_value(value):
+    """Match pandas' openpyxl cell conversion: empty -> NaN, integral numbers -> int."""
+    if value is None or value == "":
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_excel_chunks(path: str, sheet_name: str, skiprows: int, chunk_rows: int):
+    """Stream a sheet in row chunks with openpyxl read-only mode (same header handling as read_excel)."""
+    from openpyxl import load_workbook
+
+    book = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = book[sheet_name].iter_rows(min_row=skiprows + 1, values_only=True)
+        header = list(next(rows))
+        while header and header[-1] is None:
+            header.pop()
+        columns = [f"Unnamed: {i}" if h is None else h for i, h in enumerate(header)]
+        width = len(columns)
+
+        buffer = []
+        for row in rows:
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            buffer.append([_excel_value(v) for v in row])
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        book.close()
+
+
+def _is_text(values: pd.Series) -> np.ndarray:
+    return np.fromiter((isinstance(v, str) for v in values.to_numpy(dtype=object)), bool, len(values))
+
+
+def parse_money(values: pd.Series) -> pd.Series:
+    """Comma-formatted amounts to float; numeric cells are taken as-is, only text cells are parsed."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    is_text = _is_text(values)
+    out = pd.to_numeric(values.where(~is_text), errors="coerce").astype(float)
+    if is_text.any():
+        out[is_text] = values[is_text].str.replace(",", "", regex=False).astype(float)
+    return out
+
+
+def dedupe_key(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    A frame whose row hashes agree with whole-sheet drop_duplicates(): each
+    column is split into a float64 part and a text part, so per-chunk dtype
+    inference (int vs float vs object) does not change a row's hash.
+    """
+    key = {}
+    for col in chunk.columns:
+        values = chunk[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            is_text = _is_text(values)
+            key[col] = pd.to_numeric(values.where(~is_text), errors="coerce").astype(float)
+            key[f"{col}#text"] = values.where(is_text, "")
+        else:
+            key[col] = values.astype(float)
+            key[f"{col}#text"] = pd.Series("", index=values.index, dtype=object)
+    return pd.DataFrame(key)
+
+
+def _track_missing(chunk: pd.DataFrame, has_nan: dict, pending: dict):
+    """
+    read_excel turns an integer column into float if any cell is empty, except
+    in trailing empty rows it trims. Track that across chunks: a blank after the
+    last non-empty row so far stays pending until more data shows up.
+    """
+    nonempty = np.flatnonzero(chunk.notna().any(axis=1).to_numpy())
+    for col in has_nan:
+        missing = chunk[col].isna().to_numpy()
+        if len(nonempty):
+            last = nonempty[-1]
+            has_nan[col] |= pending[col] or missing[:last + 1].any()
+            pending[col] = missing[last + 1:].any()
+        else:
+            pending[col] |= missing.any()
+
+
+def _rewrite_as_float(output_path: str, columns: list, chunk_rows: int):
+    """Re-emit integer columns as float, as a whole-sheet read would have (rare: only with blanks)."""
+    tmp_path = output_path + ".tmp"
+    reader = pd.read_csv(output_path, chunksize=chunk_rows, float_precision="round_trip",
+                         dtype={col: float for col in columns})
+    with open(tmp_path, "w", newline="") as f:
+        for i, chunk in enumerate(reader):
+            chunk.to_csv(f, index=False, header=(i == 0))
+    os.replace(tmp_path, output_path)
+
+
+def clean_exposures_streaming(
+    source: str = "original_data/case_data.xlsx",
+    output_path: str = "cleaned_data/exposures_cleaned.csv",
+    chunk_rows: int = CHUNK_ROWS,
+):
+    """
+    与 main() 输出逐字节一致的流式版本：
+    1) 分块读取 Exposures 表（内存只保留一块 + 已见行的哈希）
+    2) 去除全空行；用行哈希跨块去重
+    3) 逐块转换金额列、过滤异常 TIV / Premium，追加写入 CSV
+    """
+    seen = RowHashSet()
+    has_nan = {col: False for col in INT_COLS}
+    pending = {col: False for col in INT_COLS}
+    rows_in = rows_out = 0
+    wrote_header = False
+    with open(output_path, "w", newline="") as f:
+        for chunk in iter_excel_chunks(source, "Exposures", 4, chunk_rows):
+            rows_in += len(chunk)
+            _track_missing(chunk, has_nan, pending)
+            chunk = chunk.dropna(how="all")
+            hashes = pd.util.hash_pandas_object(dedupe_key(chunk), index=False, categorize=False).to_numpy()
+            chunk = chunk[seen.add_new(hashes)].copy()
+
+            chunk = chunk.rename(columns=RENAME_DICT)
+            for col in MONEY_COLS:
+                chunk[col] = parse_money(chunk[col])
+            for col in ["Latitude", "Longitude"]:
+                chunk[col] = chunk[col].astype(float)
+            for col in INT_COLS:
+                chunk[col] = chunk[col].astype(float if has_nan[col] or chunk[col].isna().any() else "int64")
+
+            chunk = chunk[(chunk["TotalInsuredValue"] > 0) & (chunk["Premium"] >= 0)]
+            chunk.to_csv(f, index=False, header=not wrote_header)
+            wrote_header = True
+            rows_out += len(chunk)
+
+    float_cols = [col for col in INT_COLS if has_nan[col]]
+    if float_cols:
+        _rewrite_as_float(output_path, float_cols, chunk_rows)
+
+    print(f"读取 {rows_in} 行，去重及过滤后保留 {rows_out} 行，已保存到: {output_path}")
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streaming", action="store_true", help="分块读取，适用于数百万行的 Exposures 表")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    if args.streaming:
+        clean_exposures_streaming(chunk_rows=args.chunk_rows)
+    else:
+        main()
@@ -0,0 +1,61 @@
+import pandas as pd
+
+from mmap_store import load_frame
+from time_index import HURR2_INDEX_PATH, load_or_build
+
+EXPOSURES_PATH = "cleaned_data/exposures_cleaned.csv"
+HURR2_PATH = "cleaned_data/hurr2_merged_with_h1_wind.csv"
+EXPOSURES_RISK_PATH = "cleaned_data/exposures_risk.csv"
+# Everything load_data() reads (the mmap export and time index are rebuilt from these).
+SOURCE_FILES = [EXPOSURES_PATH, HURR2_PATH, EXPOSURES_RISK_PATH]
+
+
+def load_data():
+    """
+    Loads the cleaned exposures, hurricane,
+    and any needed merges. Adjust paths as required.
+    """
+    # Memory-mapped columns from mmap_store.py when they are current, else the CSV
+    df_exposures = load_frame("exposures")
+
+    df_hurr = pd.read_csv(HURR2_PATH)
+
+    df_exposures_risk = pd.read_csv(EXPOSURES_RISK_PATH)
+
+    hurr_index = load_or_build(df_hurr, HURR2_INDEX_PATH, "date", "storm_name", "wind_speed", source_path=HURR2_PATH)
+
+    return df_exposures, df_hurr, df_exposures_risk, hurr_index
+
+
+def filter_exposures(df_exposures: pd.DataFrame, loc_selected, x_years: int):
+    """Selected locations over their last `x_years` policy years; also returns the first year kept."""
+    df_expos_filtered = df_exposures[df_exposures["Location"].isin(loc_selected)].copy()
+    min_pol_year = None
+    if len(df_expos_filtered) > 0:
+        max_pol_year = df_expos_filtered["PolicyYear"].max()
+        min_pol_year = max_pol_year - x_years + 1
+        df_expos_filtered = df_expos_filtered[df_expos_filtered["PolicyYear"] >= min_pol_year]
+    return df_expos_filtered, min_pol_year
+
+
+def year_filter(hurr_index, year_selected) -> tuple:
+    """The years filter_hurricanes restricts to, sorted; () when none or all are selected (no restriction)."""
+    years = tuple(sorted(set(year_selected)))
+    return years if 0 < len(years) < len(hurr_index.years()) else ()
+
+
+def filter_hurricanes(df_hurr: pd.DataFrame, hurr_index, storm_selected, year_selected) -> pd.DataFrame:
+    """Selected storms, restricted to the selected years with binary-search slices of the time index."""
+    years = year_filter(hurr_index, year_selected)
+    if years:
+        df_hurr_filtered = df_hurr.iloc[hurr_index.year_rows(years)]
+    else:
+        df_hurr_filtered = df_hurr
+    return df_hurr_filtered[df_hurr_filtered["storm_name"].isin(storm_selected)].copy()
+
+
+def filter_risk(df_exposures_risk: pd.DataFrame, loc_selected, min_pol_year) -> pd.DataFrame:
+    df_risk_filtered = df_exposures_risk[df_exposures_risk["Location"].isin(loc_selected)].copy()
+    if min_pol_year is not None and "PolicyYear" in df_risk_filtered.columns:
+        df_risk_filtered = df_risk_filtered[df_risk_filtered["PolicyYear"] >= min_pol_year]
+    return df_risk_filtered
@@ -0,0 +1,140 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from risk_engine import iter_chunks, prepare_tracks, unique_locations
+
+EXPOSURES_PATH = "cleaned_data/exposures_cleaned.csv"
+HURR_PATH = "cleaned_data/hurr2_merged_with_h1_wind.csv"
+DISTANCE_INDEX_PATH = "cleaned_data/distance_index.npz"
+
+# Largest radius (degrees) a what-if can ask for; track points further out are not stored.
+MAX_RADIUS_DEGREES = 5.0
+
+# Current PML tiers, see categorize_pml() in management_request_2_integrate.py.
+PML_TIV_HIGH = 500_000
+PML_TIV_MEDIUM = 100_000
+PML_WIND_HIGH = 64
+PML_WIND_MEDIUM = 50
+
+
+def _chunk_distances(loc_ids, loc_lat, loc_lon, hur_lat, hur_lon, wind, storm, radius):
+    # Chebyshev distance: within r degrees in both lat and lon, the same box as is_at_risk.
+    dist = np.maximum(np.abs(loc_lat[:, None] - hur_lat[None, :]), np.abs(loc_lon[:, None] - hur_lon[None, :]))
+    loc_idx, pt_idx = np.nonzero(dist <= radius)
+    # Unnamed points count towards is_at_risk but not MaxWindNearLocation, as in the join.
+    wind = np.where(pd.isna(storm), np.nan, wind.astype(float))
+    return loc_ids[loc_idx], dist[loc_idx, pt_idx], wind[pt_idx]
+
+
+class DistanceIndex:
+    """
+    Per Location, the track points within `max_radius` degrees sorted by distance.
+
+    CSR-style: the entries of `locations[i]` are `indptr[i]:indptr[i + 1]`, with
+    `dist` ascending and `max_wind` the running max of wind up to that distance,
+    so any radius <= `max_radius` is answered without redoing the join.
+    """
+
+    def __init__(self, locations, indptr, dist, max_wind, max_radius):
+        self.locations = np.asarray(locations)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.dist = np.asarray(dist, dtype=float)
+        self.max_wind = np.asarray(max_wind, dtype=float)
+        self.max_radius = float(max_radius)
+        self._rows = np.repeat(np.arange(len(self.locations)), np.diff(self.indptr))
+
+    @classmethod
+    def build(cls, df_exposures: pd.DataFrame, df_hurr: pd.DataFrame, max_radius: float = MAX_RADIUS_DEGREES):
+        tracks = prepare_tracks(df_hurr)
+        results = [_chunk_distances(*args) for args in iter_chunks(unique_locations(df_exposures), tracks, max_radius)]
+        loc_ids = np.concatenate([r[0] for r in results]) if results else np.array([])
+        dist = np.concatenate([r[1] for r in results]) if results else np.array([])
+        wind = np.concatenate([r[2] for r in results]) if results else np.array([])
+
+        locations = np.unique(df_exposures["Location"].to_numpy())
+        row = np.searchsorted(locations, loc_ids)
+        order = np.lexsort((dist, row))
+        row, dist, wind = row[order], dist[order], wind[order]
+        indptr = np.r_[0, np.cumsum(np.bincount(row, minlength=len(locations)))]
+
+        # Running max within each location: restart the accumulation at every segment start.
+        max_wind = wind.copy()
+        for start, end in zip(indptr[:-1], indptr[1:]):
+            if end > start:
+                np.fmax.accumulate(wind[start:end], out=max_wind[start:end])
+        return cls(locations, indptr, dist, max_wind, max_radius)
+
+    def location_risk(self, radius: float) -> pd.DataFrame:
+        """`is_at_risk` and `MaxWindNearLocation` (0 if nothing in range) per location for one radius."""
+        if radius > self.max_radius:
+            raise ValueError(f"radius {radius} exceeds the indexed maximum of {self.max_radius}")
+        counts = np.bincount(self._rows[self.dist <= radius], minlength=len(self.locations))
+        at_risk = counts > 0
+        wind = np.zeros(len(self.locations))
+        last = self.indptr[:-1][at_risk] + counts[at_risk] - 1
+        wind[at_risk] = np.nan_to_num(self.max_wind[last], nan=0.0)
+        return pd.DataFrame({"Location": self.locations, "is_at_risk": at_risk, "MaxWindNearLocation": wind})
+
+    def exposure_risk(self, df_exposures: pd.DataFrame, radius: float):
+        """Per exposure row: (is_at_risk, MaxWindNearLocation) arrays for one radius."""
+        df_loc = self.location_risk(radius)
+        row = np.searchsorted(self.locations, df_exposures["Location"].to_numpy())
+        return df_loc["is_at_risk"].to_numpy()[row], df_loc["MaxWindNearLocation"].to_numpy()[row]
+
+    def save(self, path: str = DISTANCE_INDEX_PATH):
+        np.savez_compressed(path, locations=self.locations, indptr=self.indptr, dist=self.dist,
+                            max_wind=self.max_wind, max_radius=self.max_radius)
+
+    @classmethod
+    def load(cls, path: str = DISTANCE_INDEX_PATH):
+        with np.load(path) as data:
+            return cls(data["locations"], data["indptr"], data["dist"], data["max_wind"], data["max_radius"])
+
+
+def pml_category(tiv, at_risk, wind, tiv_high=PML_TIV_HIGH, tiv_medium=PML_TIV_MEDIUM,
+                 wind_high=PML_WIND_HIGH, wind_medium=PML_WIND_MEDIUM) -> np.ndarray:
+    """Vectorized categorize_pml() with adjustable tiers."""
+    tiv, at_risk, wind = np.asarray(tiv), np.asarray(at_risk, dtype=bool), np.asarray(wind)
+    return np.select(
+        [(tiv > tiv_high) & at_risk & (wind >= wind_high), (tiv > tiv_medium) | (wind >= wind_medium)],
+        ["High", "Medium"],
+        "Low",
+    )
+
+
+def what_if(df_exposures: pd.DataFrame, index: DistanceIndex, radius: float, **tiers):
+    """At-risk TIV and the PML TIV summary for one radius / set of PML tiers."""
+    at_risk, wind = index.exposure_risk(df_exposures, radius)
+    tiv = df_exposures["TotalInsuredValue"].to_numpy(dtype=float)
+    category = pml_category(tiv, at_risk, wind, **tiers)
+    df_pml_summary = (
+        pd.DataFrame({"PML_Category": category, "TotalInsuredValue": tiv})
+        .groupby("PML_Category")["TotalInsuredValue"]
+        .sum()
+        .reset_index(name="TIV_Sum")
+    )
+    return tiv[at_risk].sum(), tiv.sum(), df_pml_summary
+
+
+def load_or_build_index(path: str = DISTANCE_INDEX_PATH, max_radius: float = MAX_RADIUS_DEGREES) -> DistanceIndex:
+    """Cached index, rebuilt only when the exposures or track CSVs are newer than it."""
+    if os.path.exists(path) and all(os.path.getmtime(path) >= os.path.getmtime(p) for p in (EXPOSURES_PATH, HURR_PATH)):
+        index = DistanceIndex.load(path)
+        if index.max_radius >= max_radius:
+            return index
+    index = DistanceIndex.build(pd.read_csv(EXPOSURES_PATH), pd.read_csv(HURR_PATH), max_radius)
+    index.save(path)
+    return index
+
+
+def main():
+    index = DistanceIndex.build(pd.read_csv(EXPOSURES_PATH), pd.read_csv(HURR_PATH))
+    index.save()
+    print(f"Indexed {len(index.dist)} location/track-point pairs within {index.max_radius}° "
+          f"for {len(index.locations)} locations -> {DISTANCE_INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    main()
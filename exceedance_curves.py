@@ -0,0 +1,191 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from risk_engine import compute_exposure_risk
+
+# Mean damage ratio by wind speed (kt); linear in between, flat beyond the last knot.
+DAMAGE_WIND_KT = np.array([0.0, 34.0, 50.0, 64.0, 83.0, 96.0, 113.0, 137.0])
+DAMAGE_RATIO = np.array([0.0, 0.0, 0.01, 0.03, 0.08, 0.15, 0.30, 0.50])
+
+RETURN_PERIODS = (100, 250, 500)
+
+# Return periods longer than the record are extrapolated from a loss = a + b * ln(RP)
+# fit (an exponential tail) over the record's years at least this rare with a loss.
+TAIL_MIN_RETURN_PERIOD = 2.0
+TAIL_MIN_POINTS = 3
+
+
+def damage_ratio(wind_speed: np.ndarray) -> np.ndarray:
+    """Map wind speed (kt) to a mean damage ratio of TIV."""
+    return np.interp(np.asarray(wind_speed, dtype=float), DAMAGE_WIND_KT, DAMAGE_RATIO)
+
+
+def storm_events(df_hurr: pd.DataFrame) -> pd.DataFrame:
+    """
+    Hurricane 2 track points tagged with `season` (year of `date`) and an
+    `event_id` of "<storm_name> <season>". Names are reused across seasons
+    (ALEX 1998, 2004, 2010, ...), so only (name, season) identifies one storm.
+    """
+    season = pd.to_datetime(df_hurr["date"], errors="coerce").dt.year
+    df_events = df_hurr[season.notna() & df_hurr["storm_name"].notna()].copy()
+    df_events["season"] = season[df_events.index].astype(int)
+    df_events["event_id"] = df_events["storm_name"].astype(str) + " " + df_events["season"].astype(str)
+    return df_events
+
+
+def event_winds(df_exposures: pd.DataFrame, df_events: pd.DataFrame) -> pd.DataFrame:
+    """Max wind per (Location, event) from the risk pass, with each event's storm_name and season."""
+    _, impact = compute_exposure_risk(df_exposures, df_events, storm_col="event_id")
+    df_event_wind = impact.to_frame().rename(columns={"storm_name": "event_id"})
+    events = df_events.drop_duplicates("event_id").set_index("event_id")
+    df_event_wind["storm_name"] = df_event_wind["event_id"].map(events["storm_name"])
+    df_event_wind["season"] = df_event_wind["event_id"].map(events["season"])
+    return df_event_wind
+
+
+def build_event_loss_table(
+    df_event_wind: pd.DataFrame,
+    df_exposures: pd.DataFrame,
+    policy_year: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Per event-location ground-up losses.
+
+    Each historical storm is replayed against the portfolio as of `policy_year`
+    (latest by default): loss = TIV * damage_ratio(MaxWindAtLocation).
+    """
+    if policy_year is None:
+        policy_year = df_exposures["PolicyYear"].max()
+    tiv = (
+        df_exposures[df_exposures["PolicyYear"] == policy_year]
+        .groupby("Location")["TotalInsuredValue"]
+        .sum()
+    )
+
+    df_elt = df_event_wind[["event_id", "storm_name", "season", "Location", "MaxWindAtLocation"]].copy()
+    df_elt["TotalInsuredValue"] = df_elt["Location"].map(tiv).fillna(0.0)
+    df_elt["loss"] = df_elt["TotalInsuredValue"].to_numpy() * damage_ratio(
+        df_elt["MaxWindAtLocation"].to_numpy()
+    )
+    return df_elt
+
+
+def year_loss_arrays(
+    event_ids: np.ndarray, years: np.ndarray, losses: np.ndarray, first_year: int, n_years: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Collapse event-location losses into per-year occurrence (largest event)
+    and aggregate (sum of events) losses. Years without events stay at 0.
+    """
+    event_codes, event_index = pd.factorize(event_ids, sort=False)
+    event_loss = np.bincount(event_codes, weights=losses, minlength=len(event_index))
+
+    # Every row of an event carries the same year, so any write per event will do.
+    event_year = np.empty(len(event_index), dtype=np.int64)
+    event_year[event_codes] = np.asarray(years, dtype=np.int64)
+    year_pos = event_year - first_year
+
+    aggregate = np.bincount(year_pos, weights=event_loss, minlength=n_years)[:n_years]
+
+    occurrence = np.zeros(n_years)
+    if len(event_loss):
+        order = np.argsort(year_pos, kind="stable")
+        sorted_pos = year_pos[order]
+        starts = np.flatnonzero(np.r_[True, sorted_pos[1:] != sorted_pos[:-1]])
+        occurrence[sorted_pos[starts]] = np.maximum.reduceat(event_loss[order], starts)
+    return occurrence, aggregate
+
+
+def exceedance_curve(year_losses: np.ndarray) -> pd.DataFrame:
+    """Empirical exceedance curve: rank k of n years has probability k / n."""
+    n_years = len(year_losses)
+    losses = np.sort(year_losses)[::-1]
+    rank = np.arange(1, n_years + 1)
+    return pd.DataFrame({
+        "rank": rank,
+        "loss": losses,
+        "exceedance_prob": rank / n_years,
+        "return_period": n_years / rank,
+    })
+
+
+def fit_tail(curve: pd.DataFrame, min_return_period: float = TAIL_MIN_RETURN_PERIOD,
+             min_points: int = TAIL_MIN_POINTS) -> Optional[tuple]:
+    """Least-squares (a, b) of loss = a + b * ln(return period) over the tail; None if too few points."""
+    tail = curve[(curve["return_period"] >= min_return_period) & (curve["loss"] > 0)]
+    if len(tail) < min_points:
+        return None
+    b, a = np.polyfit(np.log(tail["return_period"].to_numpy()), tail["loss"].to_numpy(), 1)
+    return a, b
+
+
+def pml_at_return_periods(curve: pd.DataFrame, return_periods=RETURN_PERIODS) -> np.ndarray:
+    """
+    Loss at each return period: interpolated within the record, extrapolated with
+    fit_tail() beyond it (never below the record maximum). NaN when the tail is too
+    short to fit.
+    """
+    rp = curve["return_period"].to_numpy()[::-1]
+    loss = curve["loss"].to_numpy()[::-1]
+    periods = np.asarray(return_periods, dtype=float)
+    out = np.interp(periods, rp, loss)
+
+    beyond = periods > rp.max()
+    if beyond.any():
+        fit = fit_tail(curve)
+        if fit is None:
+            out[beyond] = np.nan
+        else:
+            a, b = fit
+            out[beyond] = np.maximum(a + b * np.log(periods[beyond]), loss.max())
+    return out
+
+
+def compute_ep_curves(df_elt: pd.DataFrame, first_year: int, last_year: int):
+    """OEP/AEP curves plus the return-period PML table from an event loss table."""
+    n_years = last_year - first_year + 1
+    occurrence, aggregate = year_loss_arrays(
+        df_elt["event_id"].to_numpy(),
+        df_elt["season"].to_numpy(),
+        df_elt["loss"].to_numpy(),
+        first_year,
+        n_years,
+    )
+
+    df_oep = exceedance_curve(occurrence).assign(curve="OEP")
+    df_aep = exceedance_curve(aggregate).assign(curve="AEP")
+    df_curves = pd.concat([df_oep, df_aep], ignore_index=True)
+
+    df_pml = pd.DataFrame({
+        "return_period": RETURN_PERIODS,
+        "OEP_PML": pml_at_return_periods(df_oep),
+        "AEP_PML": pml_at_return_periods(df_aep),
+        "beyond_record": np.asarray(RETURN_PERIODS) > n_years,
+    })
+    df_pml["method"] = np.where(df_pml["beyond_record"], "tail_fit", "empirical")
+    df_pml.loc[df_pml[["OEP_PML", "AEP_PML"]].isna().any(axis=1), "method"] = "record_too_short"
+    return df_curves, df_pml
+
+
+def main():
+    df_exposures = pd.read_csv("cleaned_data/exposures_cleaned.csv")
+    df_hurr = pd.read_csv("cleaned_data/hurr2_merged_with_h1_wind.csv")
+
+    # One event per (storm_name, season): reused names in other seasons are other storms.
+    df_events = storm_events(df_hurr)
+    df_elt = build_event_loss_table(event_winds(df_exposures, df_events), df_exposures)
+    df_curves, df_pml = compute_ep_curves(
+        df_elt, int(df_events["season"].min()), int(df_events["season"].max())
+    )
+
+    print("\n=== Return-period PML (OEP / AEP) ===")
+    print(df_pml)
+
+    df_curves.to_csv("cleaned_data/ep_curves.csv", index=False)
+    df_pml.to_csv("cleaned_data/pml_return_periods.csv", index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from time_index import TrackTimeIndex, HURR1_INDEX_PATH
+
 df_hurr1 = pd.read_excel(
     "original_data/case_data.xlsx",
     sheet_name="Historical Hurricane 1",
@@ -80,6 +82,9 @@ plt.tight_layout()
 
 df_hurr1.to_csv("cleaned_data/hurr1_cleaned.csv", index=False)
 
+# 入库时建立 ISO_TIME 时间索引（按时间排序 + 每个风暴的偏移量），后续按日期过滤直接二分查找
+TrackTimeIndex.build(df_hurr1, "ISO_TIME", "SID", "WMO_WIND", source_path="cleaned_data/hurr1_cleaned.csv").save(HURR1_INDEX_PATH)
+
 
 import pandas as pd
 import matplotlib.pyplot as plt
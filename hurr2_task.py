@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from time_index import TrackTimeIndex, HURR2_INDEX_PATH
+
 # 读取已经清洗完成的 hurr1 数据
 df_hurr1 = pd.read_csv("cleaned_data/hurr1_cleaned.csv")
 print("【df_hurr1】", df_hurr1.shape)
@@ -93,3 +95,7 @@ print(wind_recon.head(20))
 wind_recon.to_csv("cleaned_data/hurr_wind_reconciliation.csv", index=False)
 
 df_hurr2_merged.to_csv("cleaned_data/hurr2_merged_with_h1_wind.csv", index=False)
+
+# 入库时建立 date 时间索引，供按年份/季节过滤和年度风速汇总使用
+TrackTimeIndex.build(df_hurr2_merged, "date", "storm_name", "wind_speed",
+                      source_path="cleaned_data/hurr2_merged_with_h1_wind.csv").save(HURR2_INDEX_PATH)
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+IMPACT_MATRIX_PATH = "cleaned_data/impact_matrix.npz"
+
+
+def reduce_max_triplets(loc_ids, storm_names, wind):
+    """
+    Collapse (location, storm, wind) hits to one max wind per pair, NaN-skipping
+    like groupby().max(). Hits without a storm name are dropped, as groupby does.
+    """
+    storm_names = np.asarray(storm_names, dtype=object)
+    named = ~pd.isna(storm_names)
+    loc_ids, storm_names, wind = np.asarray(loc_ids)[named], storm_names[named], np.asarray(wind)[named]
+    if not len(loc_ids):
+        return loc_ids, storm_names, wind
+
+    loc_codes, loc_uniques = pd.factorize(loc_ids, sort=True)
+    storm_codes, storm_uniques = pd.factorize(storm_names, sort=True)
+    key = loc_codes.astype(np.int64) * len(storm_uniques) + storm_codes
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    pair_wind = np.fmax.reduceat(wind[order], starts)
+    pair_key = key[starts]
+    return (
+        np.asarray(loc_uniques)[pair_key // len(storm_uniques)],
+        np.asarray(storm_uniques, dtype=object)[pair_key % len(storm_uniques)],
+        pair_wind,
+    )
+
+
+def _segment_reduce(ufunc, values, indptr, empty_value):
+    """Apply `ufunc.reduceat` per CSR segment; empty segments (if any) get `empty_value`."""
+    nonempty = indptr[:-1] < indptr[1:]
+    if nonempty.all():
+        return ufunc.reduceat(values, indptr[:-1]) if len(values) else values[:0]
+    out = np.full(len(nonempty), empty_value, dtype=np.result_type(values.dtype, type(empty_value)))
+    if nonempty.any():
+        out[nonempty] = ufunc.reduceat(values, indptr[:-1][nonempty])
+    return out
+
+
+class ImpactMatrix:
+    """
+    Sparse Location x storm matrix of max wind at the location.
+
+    Stored CSR-style: the storms hitting `locations[i]` are
+    `storms[storm_idx[indptr[i]:indptr[i + 1]]]`, with winds alongside.
+    A storm-major (CSC) view is built on first use.
+    """
+
+    def __init__(self, locations, storms, indptr, storm_idx, wind):
+        self.locations = np.asarray(locations)
+        self.storms = np.asarray(storms, dtype=object)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.storm_idx = np.asarray(storm_idx, dtype=np.int64)
+        self.wind = np.asarray(wind)
+        self._loc_lookup = {loc: i for i, loc in enumerate(self.locations.tolist())}
+        self._storm_lookup = {name: i for i, name in enumerate(self.storms.tolist())}
+        self._csc = None
+
+    @classmethod
+    def from_triplets(cls, loc_ids, storm_names, wind, locations=None):
+        """
+        Build from (location, storm, wind) hits. `locations` lists every portfolio
+        location so rows without hits still exist; defaults to the hit locations.
+        """
+        loc_ids, storm_names, wind = reduce_max_triplets(loc_ids, storm_names, wind)
+        if locations is None:
+            locations = loc_ids
+        locations = np.unique(np.asarray(locations))
+        storms = np.unique(storm_names.astype(str)) if len(storm_names) else np.array([], dtype=object)
+
+        row = np.searchsorted(locations, loc_ids)
+        col = np.searchsorted(storms, storm_names.astype(str)) if len(storm_names) else np.array([], dtype=np.int64)
+        order = np.lexsort((col, row))
+        indptr = np.r_[0, np.cumsum(np.bincount(row, minlength=len(locations)))]
+        return cls(locations, storms.astype(object), indptr, col[order], wind[order])
+
+    # ---- lookups ----
+
+    def storms_for_location(self, location) -> pd.DataFrame:
+        i = self._loc_lookup.get(location)
+        if i is None:
+            return pd.DataFrame({"storm_name": [], "MaxWindAtLocation": []})
+        seg = slice(self.indptr[i], self.indptr[i + 1])
+        return pd.DataFrame({
+            "storm_name": self.storms[self.storm_idx[seg]],
+            "MaxWindAtLocation": self.wind[seg],
+        })
+
+    def _storm_major(self):
+        if self._csc is None:
+            rows = np.repeat(np.arange(len(self.locations)), np.diff(self.indptr))
+            order = np.argsort(self.storm_idx, kind="stable")
+            storm_indptr = np.r_[0, np.cumsum(np.bincount(self.storm_idx, minlength=len(self.storms)))]
+            self._csc = (storm_indptr, order, rows[order])
+        return self._csc
+
+    def locations_for_storm(self, storm) -> pd.DataFrame:
+        j = self._storm_lookup.get(storm)
+        if j is None:
+            return pd.DataFrame({"Location": [], "MaxWindAtLocation": []})
+        storm_indptr, order, loc_rows = self._storm_major()
+        seg = slice(storm_indptr[j], storm_indptr[j + 1])
+        return pd.DataFrame({
+            "Location": self.locations[loc_rows[seg]],
+            "MaxWindAtLocation": self.wind[order[seg]],
+        })
+
+    # ---- reductions ----
+
+    def max_by_location(self, fill_value=0) -> pd.Series:
+        """Max wind over all storms per location (`MaxWindNearLocation`)."""
+        return pd.Series(_segment_reduce(np.fmax, self.wind, self.indptr, fill_value),
+                         index=pd.Index(self.locations, name="Location"))
+
+    def max_by_storm(self) -> pd.Series:
+        """Max wind over all locations per storm (`MaxWind_AtRisk`)."""
+        storm_indptr, order, _ = self._storm_major()
+        return pd.Series(_segment_reduce(np.fmax, self.wind[order], storm_indptr, np.nan),
+                         index=pd.Index(self.storms, name="storm_name"))
+
+    def sum_by_location(self, weights=None) -> pd.Series:
+        """Sum of wind (or of per-entry `weights`) per location."""
+        values = self.wind if weights is None else np.asarray(weights)
+        return pd.Series(_segment_reduce(np.add, values, self.indptr, 0),
+                         index=pd.Index(self.locations, name="Location"))
+
+    def sum_by_storm(self, weights=None) -> pd.Series:
+        """Sum of wind (or of per-entry `weights`, CSR order) per storm."""
+        storm_indptr, order, _ = self._storm_major()
+        values = (self.wind if weights is None else np.asarray(weights))[order]
+        return pd.Series(_segment_reduce(np.add, values, storm_indptr, 0),
+                         index=pd.Index(self.storms, name="storm_name"))
+
+    def count_by_location(self) -> pd.Series:
+        return pd.Series(np.diff(self.indptr), index=pd.Index(self.locations, name="Location"))
+
+    def at_risk_locations(self) -> np.ndarray:
+        return self.locations[np.diff(self.indptr) > 0]
+
+    # ---- conversion / storage ----
+
+    def relabel(self, mapping) -> "ImpactMatrix":
+        """
+        Rename storms through `mapping` (old -> new, e.g. event id -> storm_name);
+        storms that map to the same name are merged, keeping the max wind.
+        """
+        df = self.to_frame()
+        return ImpactMatrix.from_triplets(
+            df["Location"].to_numpy(),
+            df["storm_name"].map(mapping).to_numpy(dtype=object),
+            df["MaxWindAtLocation"].to_numpy(),
+            self.locations,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long form, identical to `exposures_loc_storm_wind.csv`."""
+        rows = np.repeat(np.arange(len(self.locations)), np.diff(self.indptr))
+        return pd.DataFrame({
+            "Location": self.locations[rows],
+            "storm_name": self.storms[self.storm_idx],
+            "MaxWindAtLocation": self.wind,
+        })
+
+    def save(self, path: str = IMPACT_MATRIX_PATH):
+        np.savez_compressed(
+            path, locations=self.locations, storms=self.storms.astype(str),
+            indptr=self.indptr, storm_idx=self.storm_idx, wind=self.wind,
+        )
+
+    @classmethod
+    def load(cls, path: str = IMPACT_MATRIX_PATH):
+        with np.load(path) as data:
+            return cls(data["locations"], data["storms"].astype(object),
+                       data["indptr"], data["storm_idx"], data["wind"])
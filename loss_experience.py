@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+EXPOSURES_PATH = "cleaned_data/exposures_cleaned.csv"
+LOSS_EXPERIENCE_PATH = "cleaned_data/loss_experience.npz"
+
+# Summed per (Location, PolicyYear); the ratios of Management Request 1 are derived from them.
+SUM_COLS = ["TotalInsuredValue", "Premium", "NonCatLoss"]
+
+
+def add_ratios(df: pd.DataFrame) -> pd.DataFrame:
+    """Loss Ratio, Loss Cost and Premium per $100 TIV, as in management_request_1.py."""
+    df["LossRatio"] = df["NonCatLoss"] / df["Premium"]
+    df["LossCost"] = df["NonCatLoss"] / df["TotalInsuredValue"]
+    df["Premium_per_100_TIV"] = 100 * df["Premium"] / df["TotalInsuredValue"]
+    return df
+
+
+class LossExperience:
+    """
+    Per-Location cumulative sums over PolicyYear.
+
+    `cum[col][i, j]` is the sum of `col` for `locations[i]` over policy years
+    `first_year .. first_year + j - 1`, so any year window of any location is
+    one difference. `last_year[i]` is the latest policy year written for it.
+    """
+
+    def __init__(self, locations, first_year, cum: dict, last_year):
+        self.locations = np.asarray(locations)
+        self.first_year = int(first_year)
+        self.cum = {col: np.asarray(cum[col], dtype=float) for col in SUM_COLS}
+        self.last_year = np.asarray(last_year, dtype=np.int64)
+        self.n_years = self.cum[SUM_COLS[0]].shape[1] - 1
+
+    @classmethod
+    def build(cls, df_exposures: pd.DataFrame):
+        locations, loc_idx = np.unique(df_exposures["Location"].to_numpy(), return_inverse=True)
+        years = df_exposures["PolicyYear"].to_numpy(dtype=np.int64)
+        first_year = int(years.min()) if len(years) else 0
+        n_years = int(years.max()) - first_year + 1 if len(years) else 0
+        cell = loc_idx * n_years + (years - first_year)
+
+        cum = {}
+        for col in SUM_COLS:
+            # Missing values count as 0 (as pandas .sum() does) instead of spreading NaN through the cumsum
+            weights = np.nan_to_num(df_exposures[col].to_numpy(dtype=float))
+            totals = np.bincount(cell, weights=weights,
+                                 minlength=len(locations) * n_years).reshape(len(locations), n_years)
+            cum[col] = np.concatenate([np.zeros((len(locations), 1)), np.cumsum(totals, axis=1)], axis=1)
+
+        last_year = np.full(len(locations), first_year - 1, dtype=np.int64)
+        np.maximum.at(last_year, loc_idx, years)
+        return cls(locations, first_year, cum, last_year)
+
+    def _rows(self, loc_selected) -> np.ndarray:
+        loc_selected = np.asarray(loc_selected)
+        rows = np.searchsorted(self.locations, loc_selected)
+        found = rows < len(self.locations)
+        found[found] = self.locations[rows[found]] == loc_selected[found]
+        return rows[found]
+
+    def _bounds(self, start_year: int, end_year: int):
+        lo = int(np.clip(start_year - self.first_year, 0, self.n_years))
+        hi = int(np.clip(end_year - self.first_year + 1, 0, self.n_years))
+        return lo, max(lo, hi)
+
+    def window_end(self, loc_selected) -> int:
+        """Latest policy year among the selected locations (the end of the dashboard's window)."""
+        rows = self._rows(loc_selected)
+        return int(self.last_year[rows].max()) if len(rows) else self.first_year - 1
+
+    def by_location(self, loc_selected, x_years: int, end_year: int = None) -> pd.DataFrame:
+        """
+        Each selected location's totals and ratios over policy years
+        `end_year - x_years + 1 .. end_year` (default end: as in the dashboard filter).
+        """
+        rows = self._rows(loc_selected)
+        if end_year is None:
+            end_year = self.window_end(loc_selected)
+        lo, hi = self._bounds(end_year - x_years + 1, end_year)
+        df = pd.DataFrame({"Location": self.locations[rows]})
+        for col in SUM_COLS:
+            df[col] = self.cum[col][rows, hi] - self.cum[col][rows, lo]
+        return add_ratios(df)
+
+    def totals(self, loc_selected, x_years: int, end_year: int = None) -> dict:
+        """Account-level totals and ratios over the window, summed across the selected locations."""
+        df = self.by_location(loc_selected, x_years, end_year)
+        total = {col: df[col].sum() for col in SUM_COLS}
+        return add_ratios(pd.DataFrame([total])).iloc[0].to_dict()
+
+    def save(self, path: str = LOSS_EXPERIENCE_PATH):
+        np.savez_compressed(path, locations=self.locations, first_year=self.first_year,
+                            last_year=self.last_year, **{f"cum_{col}": self.cum[col] for col in SUM_COLS})
+
+    @classmethod
+    def load(cls, path: str = LOSS_EXPERIENCE_PATH):
+        with np.load(path) as data:
+            cum = {col: data[f"cum_{col}"] for col in SUM_COLS}
+            return cls(data["locations"], data["first_year"], cum, data["last_year"])
+
+
+def load_or_build_experience(path: str = LOSS_EXPERIENCE_PATH) -> LossExperience:
+    """Cached arrays, rebuilt only when exposures_cleaned.csv is newer than the cache."""
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(EXPOSURES_PATH):
+        return LossExperience.load(path)
+    experience = LossExperience.build(pd.read_csv(EXPOSURES_PATH))
+    experience.save(path)
+    return experience
+
+
+def main():
+    experience = LossExperience.build(pd.read_csv(EXPOSURES_PATH))
+    experience.save()
+    print(f"{len(experience.locations)} locations x {experience.n_years} policy years -> {LOSS_EXPERIENCE_PATH}")
+    print("\n=== Last 5 policy years, per location ===")
+    print(experience.by_location(experience.locations, 5))
+
+
+if __name__ == "__main__":
+    main()
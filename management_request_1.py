@@ -1,13 +1,57 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+SUMMARY_PATH = "cleaned_data/exposures_summary_by_year.csv"
+RENDER_STATE_PATH = "pic/.render_state.json"
+
+# 每张图的配置：(列名, 图例) 列表、标题、Y 轴、尺寸、可选阈值线
+CHARTS = [
+    {
+        "path": "pic/tiv_premium_over_time.png",
+        "lines": [["TotalInsuredValue", "TIV"], ["Premium", "Premium"]],
+        "title": "TIV & Premium Over Time",
+        "ylabel": "Amount in $",
+        "figsize": [10, 6],
+    },
+    {
+        "path": "pic/loss_ratio_over_time.png",
+        "lines": [["LossRatio", None]],
+        "title": "Loss Ratio Over Time",
+        "ylabel": "Loss Ratio",
+        "figsize": [8, 5],
+        "threshold": 1.0,
+    },
+    {
+        "path": "pic/premium_per_100_tiv_over_time.png",
+        "lines": [["Premium_per_100_TIV", None]],
+        "title": "Premium per $100 TIV Over Time",
+        "ylabel": "Premium per $100 TIV",
+        "figsize": [8, 5],
+    },
+    {
+        "path": "pic/loss_cost_over_time.png",
+        "lines": [["LossCost", None]],
+        "title": "Loss Cost Over Time",
+        "ylabel": "Loss Cost",
+        "figsize": [8, 5],
+    },
+]
+
+
 def main():
     """
     读取 exposures_cleaned.csv 后，
     1) 按年份汇总关键字段 (TIV, Premium, Losses)
     2) 计算 Loss Ratio, Loss Cost, Premium per $100 TIV
-    3) 分别绘制随时间变化的趋势图
+    3) 保存年度汇总表，再并行绘制随时间变化的趋势图
     """
 
     # =============== 1) 读取清洗后的 Exposures 数据 ===============
@@ -42,80 +86,68 @@ def main():
         100 * df_year["Premium"] / df_year["TotalInsuredValue"]
     )
 
-    # =============== 4) 画图：随时间的变化趋势 ===============
-    plt.figure(figsize=(10,6))
+    # =============== 4) 输出结果表格 ===============
+    df_year.to_csv(SUMMARY_PATH, index=False)
+    print("\n年度汇总信息已存为 exposures_summary_by_year.csv")
 
-    # a) Plot TIV
-    sns.lineplot(
-        data=df_year,
-        x="PolicyYear", y="TotalInsuredValue",
-        marker="o", label="TIV"
-    )
+    # =============== 5) 画图：随时间的变化趋势（并行、无界面后端，未变化的图跳过） ===============
+    rendered = render_charts()
+    print(f"重新绘制 {len(rendered)} / {len(CHARTS)} 张图: {rendered}")
 
-    # b) Plot Premium
-    sns.lineplot(
-        data=df_year,
-        x="PolicyYear", y="Premium",
-        marker="o", label="Premium"
-    )
 
-    # 这样 TIV & Premium 会在同一张图上，数字量级如果相差太多，可能要用副Y轴。
-
-    plt.title("TIV & Premium Over Time")
-    plt.xlabel("Policy Year")
-    plt.ylabel("Amount in $")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig("pic/tiv_premium_over_time.png", dpi=300, bbox_inches="tight")
-    #plt.show()
-
-    # 画 LossRatio:
-    plt.figure(figsize=(8,5))
-    sns.lineplot(
-        data=df_year,
-        x="PolicyYear", y="LossRatio",
-        marker="o"
-    )
-    plt.title("Loss Ratio Over Time")
-    plt.xlabel("Policy Year")
-    plt.ylabel("Loss Ratio")
-    plt.tight_layout()
-    plt.savefig("pic/loss_ratio_over_time.png", dpi=300, bbox_inches="tight")
-    plt.axhline(y=1.0, color='r', linestyle='--', linewidth=1, label="Threshold (1.0)")
-    #plt.show()
-
-    # 画 Premium_per_100_TIV:
-    plt.figure(figsize=(8,5))
-    sns.lineplot(
-        data=df_year,
-        x="PolicyYear", y="Premium_per_100_TIV",
-        marker="o"
-    )
-    plt.title("Premium per $100 TIV Over Time")
-    plt.xlabel("Policy Year")
-    plt.ylabel("Premium per $100 TIV")
-    plt.tight_layout()
-    plt.savefig("pic/premium_per_100_tiv_over_time.png", dpi=300, bbox_inches="tight")
-    #plt.show()
-
-    # 画 LossCost:
-    plt.figure(figsize=(8,5))
-    sns.lineplot(
-        data=df_year,
-        x="PolicyYear", y="LossCost",
-        marker="o"
-    )
-    plt.title("Loss Cost Over Time")
-    plt.xlabel("Policy Year")
-    plt.ylabel("Loss Cost")
-    plt.tight_layout()
-    plt.savefig("pic/loss_cost_over_time.png", dpi=300, bbox_inches="tight")
-    plt.show()
+def _chart_key(chart: dict, summary_hash: str) -> str:
+    # 图的配置也参与哈希：改了某张图的样式只重画那一张
+    return hashlib.sha1(json.dumps([chart, summary_hash], sort_keys=True).encode("utf-8")).hexdigest()
 
 
-    # =============== 5) 输出结果表格 ===============
-    df_year.to_csv("cleaned_data/exposures_summary_by_year.csv", index=False)
-    print("\n年度汇总信息已存为 exposures_summary_by_year.csv")
+def render_chart(chart: dict, summary_path: str = SUMMARY_PATH) -> str:
+    """在子进程里独立绘制并保存一张图（Agg 后端，不弹窗）"""
+    df_year = pd.read_csv(summary_path)
+
+    fig, ax = plt.subplots(figsize=chart["figsize"])
+    for col, label in chart["lines"]:
+        sns.lineplot(data=df_year, x="PolicyYear", y=col, marker="o", label=label, ax=ax)
+    if chart.get("threshold") is not None:
+        # 阈值线要在 savefig 之前画上，否则不会出现在 PNG 里
+        ax.axhline(y=chart["threshold"], color="r", linestyle="--", linewidth=1,
+                   label=f"Threshold ({chart['threshold']})")
+    if ax.get_legend_handles_labels()[1]:
+        ax.legend()
+
+    ax.set_title(chart["title"])
+    ax.set_xlabel("Policy Year")
+    ax.set_ylabel(chart["ylabel"])
+    fig.tight_layout()
+    fig.savefig(chart["path"], dpi=300, bbox_inches="tight")
+    plt.close(fig)
+    return chart["path"]
+
+
+def render_charts(summary_path: str = SUMMARY_PATH, state_path: str = RENDER_STATE_PATH, workers: int = None) -> list:
+    """
+    用进程池并行绘制 CHARTS；exposures_summary_by_year.csv 内容和图配置都没变、
+    且 PNG 还在的图直接跳过。返回本次重新绘制的文件。
+    """
+    with open(summary_path, "rb") as f:
+        summary_hash = hashlib.sha1(f.read()).hexdigest()
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+
+    todo = [
+        chart for chart in CHARTS
+        if state.get(chart["path"]) != _chart_key(chart, summary_hash) or not os.path.exists(chart["path"])
+    ]
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or min(len(todo), os.cpu_count() or 1)) as pool:
+            list(pool.map(render_chart, todo, [summary_path] * len(todo)))
+
+    state.update({chart["path"]: _chart_key(chart, summary_hash) for chart in todo})
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    return [chart["path"] for chart in todo]
+
 
 if __name__ == "__main__":
     main()
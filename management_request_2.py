@@ -3,6 +3,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.patches as patches
 
+from accumulation import RESOLUTIONS, build_accumulation, save_accumulation, top_cells
+
 df_exposures = pd.read_csv("cleaned_data/exposures_cleaned.csv")
 
 plt.figure(figsize=(8,6))
@@ -44,6 +46,16 @@ df_exposures_risk = pd.merge(df_exposures, df_risk, on="Location", how="left")
 df_exposures_risk["is_at_risk"] = df_exposures_risk["is_at_risk"].fillna(False)
 
 
+# 网格累积：按多级经纬度网格汇总 TIV / 保费 / 风险 TIV，并缓存给 app.py 使用
+df_grid, df_rings = build_accumulation(df_exposures_risk)
+save_accumulation(df_grid, df_rings)
+for res in RESOLUTIONS:
+    print(f"\n=== Top 10 TIV cells ({res}° grid) ===")
+    print(top_cells(df_grid, res))
+print("\n=== Worst rings ===")
+print(df_rings)
+
+
 # TIV at risk
 tiv_at_risk = df_exposures_risk.loc[df_exposures_risk["is_at_risk"], "TotalInsuredValue"].sum()
 tiv_total = df_exposures_risk["TotalInsuredValue"].sum()
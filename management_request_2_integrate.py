@@ -1,9 +1,14 @@
+import argparse
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 
-def main():
+from season_update import event_storm_names, update_risk
+from time_index import TrackTimeIndex, HURR2_INDEX_PATH
+
+def main(incremental: bool = False):
     # 1) 读取数据
     df_hurr1 = pd.read_csv("cleaned_data/hurr1_cleaned.csv")
     df_hurr2 = pd.read_excel(
@@ -55,27 +60,22 @@ def main():
     df_hurr2_merged.to_csv("cleaned_data/hurr2_merged_with_h1_wind.csv", index=False)
     wind_recon.to_csv("cleaned_data/hurr_wind_reconciliation.csv", index=False)
 
-    # 7) 读取并合并暴露数据
+    # 入库时只解析一次 date，建立时间索引并保存
+    hurr2_index = TrackTimeIndex.build(df_hurr2_merged, "date", "storm_name", "wind_speed",
+                                       source_path="cleaned_data/hurr2_merged_with_h1_wind.csv")
+    hurr2_index.save(HURR2_INDEX_PATH)
+
+    # 7) 读取暴露数据
     df_exposures = pd.read_csv("cleaned_data/exposures_cleaned.csv")
-    df_exposure_hurr = df_exposures.assign(key=1).merge(df_hurr2_merged.assign(key=1), on="key")
-    df_exposure_hurr.drop(columns=["key"], inplace=True)
-
-    # 8) 计算地理距离近似（简单的经纬度差）
-    df_exposure_hurr["lat_diff"] = abs(df_exposure_hurr["Latitude"] - df_exposure_hurr["HurLat"])
-    df_exposure_hurr["lon_diff"] = abs(df_exposure_hurr["Longitude"] - df_exposure_hurr["HurLon"])
-    df_exposure_hurr["is_at_risk"] = (
-        (df_exposure_hurr["lat_diff"] <= 1.0) &
-        (df_exposure_hurr["lon_diff"] <= 1.0)
-    )
 
-    # 9) 按照 Location 区分是否 at_risk
-    df_risk = (
-        df_exposure_hurr.groupby("Location")["is_at_risk"]
-        .max()
-        .reset_index()
-    )
-    df_exposures_risk = pd.merge(df_exposures, df_risk, on="Location", how="left")
-    df_exposures_risk["is_at_risk"] = df_exposures_risk["is_at_risk"].fillna(False)
+    # 8-9) 按纬度分块，只与可能落在 1° 范围内的轨迹点比较（不再生成完整的 cartesian join），
+    #      同时得到每个地点是否 at_risk，以及 地点×风暴 最大风速的稀疏矩阵。
+    #      增量模式下只计算自上次运行以来新增/变化的风暴，其余沿用已保存的矩阵
+    #      矩阵按 (storm_name, 赛季) 事件保存，同名风暴不会因为新赛季而重算；输出前再按 storm_name 合并
+    df_exposures_risk, impact_events, evaluated = update_risk(df_exposures, df_hurr2_merged, incremental=incremental)
+    event_names = event_storm_names(df_hurr2_merged)
+    print(f"本次计算风暴事件数: {len(evaluated)} / {len(event_names)}")
+    impact = impact_events.relabel(event_names)
 
     # 10) 计算总暴露 & 风险暴露
     tiv_at_risk = df_exposures_risk.loc[df_exposures_risk["is_at_risk"], "TotalInsuredValue"].sum()
@@ -84,39 +84,22 @@ def main():
 
     df_exposures_risk.to_csv("cleaned_data/exposures_risk.csv", index=False)
 
-    # 11) 决定以 df_exposure_hurr["wind_speed"] 作为最终影响风速
-    df_exposure_hurr["impact_wind_speed"] = df_exposure_hurr["wind_speed"]
-
-    # 12) 选出真正落在飓风范围内的记录
-    df_impacted = df_exposure_hurr[df_exposure_hurr["is_at_risk"]].copy()
-
-    # 13) 每个飓风在投保点附近的最大风速
-    df_hurr_impact_summary = (
-        df_impacted.groupby("storm_name")["impact_wind_speed"]
-        .max()
-        .reset_index(name="MaxWind_AtRisk")
-    )
+    # 11-13) 每个飓风在投保点附近的最大风速（稀疏矩阵按风暴方向取 max，wind_speed 即影响风速）
+    df_hurr_impact_summary = impact.max_by_storm().reset_index(name="MaxWind_AtRisk")
     print("\n=== Hurricanes that impacted the portfolio (top wind speed) ===")
     print(df_hurr_impact_summary.head(20))
 
     # 14) 每个地点、每个飓风的最大风速
-    df_loc_storm = (
-        df_impacted.groupby(["Location", "storm_name"])["impact_wind_speed"]
-        .max()
-        .reset_index(name="MaxWindAtLocation")
-    )
+    df_loc_storm = impact.to_frame()
     print("\n=== Per location & storm, the max wind speed ===")
     print(df_loc_storm.head(20))
 
     df_hurr_impact_summary.to_csv("cleaned_data/hurr_impact_summary.csv", index=False)
     df_loc_storm.to_csv("cleaned_data/exposures_loc_storm_wind.csv", index=False)
 
-    # 15) 把每个地点可能有多次风暴的最大风速合并回暴露表
-    df_loc_storm_agg = (
-        df_loc_storm.groupby("Location")["MaxWindAtLocation"]
-        .max()
-        .reset_index(name="MaxWindNearLocation")
-    )
+    # 15) 把每个地点可能有多次风暴的最大风速合并回暴露表（只保留受影响的地点，其余后面填 0）
+    is_hit = impact.count_by_location() > 0
+    df_loc_storm_agg = impact.max_by_location()[is_hit].reset_index(name="MaxWindNearLocation")
 
     df_exposures_risk2 = pd.merge(
         df_exposures_risk,
@@ -153,17 +136,8 @@ def main():
 
     # ============ 以下示例为“年度风速变化”相关的新逻辑 ============
 
-    # (A) 将 df_hurr2_merged 中的 date 解析为 datetime，并提取 year
-    #     假设 df_hurr2_merged['date'] 中已有有效的日期字符串
-    df_hurr2_merged["date"] = pd.to_datetime(df_hurr2_merged["date"], errors="coerce")
-    df_hurr2_merged["year"] = df_hurr2_merged["date"].dt.year
-
-    # (B) 按年份汇总：可选择 max、mean、median 等，这里演示取“平均风速”做参考
-    df_wind_by_year = (
-        df_hurr2_merged.groupby("year")["wind_speed"]
-        .mean()  # 也可改成 .max()
-        .reset_index(name="MeanWindSpeed")
-    )
+    # (A)(B) 按年份汇总平均风速：直接用时间索引的年份边界，不再重复 pd.to_datetime
+    df_wind_by_year = hurr2_index.wind_by_year()
 
     # (C) 根据年度平均风速再做一个简单分类（仅示例）
     def categorize_wind_speed(speed):
@@ -239,4 +213,7 @@ def main():
     plt.show()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--incremental", action="store_true", help="新赛季追加后，只计算新增或变化的风暴")
+    args = parser.parse_args()
+    main(incremental=args.incremental)
@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+ARRAY_DIR = "cleaned_data/arrays"
+
+# dataset name -> (source csv, {column: dtype})
+DATASETS = {
+    "exposures": ("cleaned_data/exposures_cleaned.csv", {
+        "Location": "int64",
+        "Latitude": "float64",
+        "Longitude": "float64",
+        "TotalInsuredValue": "float64",
+        "Premium": "float64",
+        "NonCatLoss": "float64",
+        "PolicyYear": "int64",
+    }),
+    "hurr1": ("cleaned_data/hurr1_cleaned.csv", {
+        "SEASON": "int64",
+        "LAT": "float64",
+        "LON": "float64",
+        "WMO_WIND": "float64",
+    }),
+    "hurr2": ("cleaned_data/hurr2_merged_with_h1_wind.csv", {
+        "HurLat": "float64",
+        "HurLon": "float64",
+        "wind_speed": "float64",
+        "wind_radius": "float64",
+        "year": "int64",
+        "storm_code": "int64",
+    }),
+}
+
+
+def _year(dates: pd.Series):
+    # -1 where the date does not parse
+    return pd.to_datetime(dates, errors="coerce").dt.year.fillna(-1), None
+
+
+def _codes(names: pd.Series):
+    # Index into meta["categories"][column]; -1 where the name is missing
+    codes, uniques = pd.factorize(names, sort=True)
+    return pd.Series(codes, index=names.index), [str(u) for u in uniques]
+
+
+# Columns computed from a text column: column -> (source column, function returning values, categories).
+DERIVED = {
+    "hurr2": {
+        "year": ("date", _year),
+        "storm_code": ("storm_name", _codes),
+    },
+}
+
+
+def _source_stamp(path: str) -> dict:
+    stat = os.stat(path)
+    return {"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _meta_path(name: str, out_dir: str) -> str:
+    return os.path.join(out_dir, f"{name}.json")
+
+
+def export_dataset(name: str, out_dir: str = ARRAY_DIR) -> dict:
+    """
+    Write the numeric columns of one cleaned CSV as `<name>/<version>/<column>.npy`
+    files, then point the `<name>.json` header (columns, dtypes, row count, source
+    stamp, version) at them. The header swap is the only step readers can observe,
+    so they always see one complete export. The previous version is kept for
+    readers that read the old header just before the swap; older ones are removed.
+    """
+    source, columns = DATASETS[name]
+    derived = DERIVED.get(name, {})
+    usecols = sorted({derived[c][0] if c in derived else c for c in columns})
+    df = pd.read_csv(source, usecols=usecols)
+
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(out_dir, name, version)
+    os.makedirs(version_dir)
+    categories = {}
+    for col, dtype in columns.items():
+        if col in derived:
+            src_col, func = derived[col]
+            values, labels = func(df[src_col])
+            if labels is not None:
+                categories[col] = labels
+        else:
+            values = df[col]
+        arr = np.lib.format.open_memmap(os.path.join(version_dir, f"{col}.npy"), mode="w+",
+                                        dtype=dtype, shape=(len(df),))
+        arr[:] = values.to_numpy(dtype=dtype)
+        arr.flush()
+        del arr
+
+    previous = None
+    meta_path = _meta_path(name, out_dir)
+    if os.path.exists(meta_path):
+        previous = read_meta(name, out_dir).get("version")
+
+    meta = {
+        "name": name,
+        "version": version,
+        "rows": len(df),
+        "columns": columns,
+        "categories": categories,
+        "source": _source_stamp(source),
+    }
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+
+    # Mapped files stay readable after unlinking, so only readers that have not opened yet matter.
+    for old in os.listdir(os.path.join(out_dir, name)):
+        if old not in (version, previous):
+            shutil.rmtree(os.path.join(out_dir, name, old), ignore_errors=True)
+    return meta
+
+
+def read_meta(name: str, out_dir: str = ARRAY_DIR) -> dict:
+    with open(_meta_path(name, out_dir)) as f:
+        return json.load(f)
+
+
+def is_stale(name: str, out_dir: str = ARRAY_DIR) -> bool:
+    """True if the arrays are missing or the source CSV changed since export."""
+    try:
+        meta = read_meta(name, out_dir)
+    except FileNotFoundError:
+        return True
+    source = meta["source"]["path"]
+    return (
+        "version" not in meta
+        or not os.path.exists(source)
+        or _source_stamp(source) != meta["source"]
+    )
+
+
+def open_dataset(name: str, out_dir: str = ARRAY_DIR, meta: dict = None) -> dict:
+    """
+    Map every column of an exported dataset read-only. No data is copied:
+    all processes opening the same files share the page cache. Pass `meta`
+    to open exactly the version it describes.
+    """
+    if meta is None:
+        meta = read_meta(name, out_dir)
+    version_dir = os.path.join(out_dir, name, meta["version"])
+    arrays = {}
+    for col in meta["columns"]:
+        arr = np.load(os.path.join(version_dir, f"{col}.npy"), mmap_mode="r")
+        if len(arr) != meta["rows"]:
+            raise ValueError(f"{name}.{col}: {len(arr)} rows, header says {meta['rows']}")
+        arrays[col] = arr
+    return arrays
+
+
+def load_frame(name: str, out_dir: str = ARRAY_DIR) -> pd.DataFrame:
+    """
+    The dataset as a DataFrame over the mapped arrays (no parse, no copy), or
+    the source CSV when the export is missing or stale. Only for datasets whose
+    export covers every CSV column, e.g. `exposures`.
+    """
+    source, columns = DATASETS[name]
+    if is_stale(name, out_dir):
+        return pd.read_csv(source)
+    arrays = open_dataset(name, out_dir)
+    return pd.DataFrame({col: arrays[col] for col in columns}, copy=False)
+
+
+def main():
+    for name, (source, _) in DATASETS.items():
+        if not os.path.exists(source):
+            print(f"[{name}] skipped, {source} not found")
+            continue
+        meta = export_dataset(name)
+        print(f"[{name}] {meta['rows']} rows -> {ARRAY_DIR}/{name}/{meta['version']}/*.npy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+from impact_matrix import ImpactMatrix, reduce_max_triplets
+from mmap_store import is_stale, open_dataset, read_meta
+
+# A location is at risk when a track point lies within this many degrees in both lat and lon.
+AT_RISK_DEGREES = 1.0
+CHUNK_LOCATIONS = 64
+
+
+def prepare_tracks(df_hurr: pd.DataFrame, storm_col: str = "storm_name") -> dict:
+    """Track points with valid coordinates as arrays sorted by latitude; `storm_col` keys the events."""
+    df_tracks = df_hurr.dropna(subset=["HurLat", "HurLon"]).sort_values("HurLat", kind="stable")
+    return {
+        "lat": df_tracks["HurLat"].to_numpy(dtype=float),
+        "lon": df_tracks["HurLon"].to_numpy(dtype=float),
+        "wind": df_tracks["wind_speed"].to_numpy(),
+        "storm": df_tracks[storm_col].to_numpy(dtype=object),
+        "row": df_tracks.index.to_numpy(),
+    }
+
+
+def unique_locations(df_exposures: pd.DataFrame) -> pd.DataFrame:
+    """One row per Location (coordinates do not change across policy years), sorted by latitude."""
+    return (
+        df_exposures.drop_duplicates("Location")[["Location", "Latitude", "Longitude"]]
+        .sort_values("Latitude", kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def _bands(df_locs: pd.DataFrame, track_lat: np.ndarray, radius: float, chunk_size: int):
+    """Latitude-sorted location chunks with the [lo, hi) slice of track points within `radius` of each."""
+    for start in range(0, len(df_locs), chunk_size):
+        chunk = df_locs.iloc[start:start + chunk_size]
+        lo = np.searchsorted(track_lat, chunk["Latitude"].min() - radius, side="left")
+        hi = np.searchsorted(track_lat, chunk["Latitude"].max() + radius, side="right")
+        yield chunk, lo, hi
+
+
+def iter_chunks(df_locs: pd.DataFrame, tracks: dict, radius: float, chunk_size: int = CHUNK_LOCATIONS):
+    """
+    Split locations into latitude-sorted chunks, each paired with the band of
+    track points that can possibly be within `radius` of it.
+    """
+    for chunk, lo, hi in _bands(df_locs, tracks["lat"], radius, chunk_size):
+        yield (
+            chunk["Location"].to_numpy(),
+            chunk["Latitude"].to_numpy(dtype=float),
+            chunk["Longitude"].to_numpy(dtype=float),
+            tracks["lat"][lo:hi],
+            tracks["lon"][lo:hi],
+            tracks["wind"][lo:hi],
+            tracks["storm"][lo:hi],
+            radius,
+        )
+
+
+def iter_chunk_rows(df_locs: pd.DataFrame, tracks: dict, radius: float, chunk_size: int = CHUNK_LOCATIONS):
+    """Like `iter_chunks`, but each band is the source row numbers of its track points instead of their values."""
+    for chunk, lo, hi in _bands(df_locs, tracks["lat"], radius, chunk_size):
+        yield (
+            chunk["Location"].to_numpy(),
+            chunk["Latitude"].to_numpy(dtype=float),
+            chunk["Longitude"].to_numpy(dtype=float),
+            tracks["row"][lo:hi],
+            radius,
+        )
+
+
+def risk_chunk(loc_ids, loc_lat, loc_lon, hur_lat, hur_lon, wind, storm, radius):
+    """
+    Evaluate one chunk of locations against its track band.
+
+    Returns the at-risk Location ids and the (Location, storm, max wind) hits.
+    """
+    hit = (
+        (np.abs(loc_lat[:, None] - hur_lat[None, :]) <= radius)
+        & (np.abs(loc_lon[:, None] - hur_lon[None, :]) <= radius)
+    )
+    loc_idx, pt_idx = np.nonzero(hit)
+    at_risk = loc_ids[np.unique(loc_idx)]
+    return at_risk, reduce_max_triplets(loc_ids[loc_idx], storm[pt_idx], wind[pt_idx])
+
+
+# Per-process hurr2 arrays for `risk_chunk_rows`, reopened only when the export version changes.
+_SHARED_TRACKS = {}
+
+
+def _shared_tracks(meta: dict) -> dict:
+    if _SHARED_TRACKS.get("version") != meta["version"]:
+        arrays = open_dataset("hurr2", meta=meta)
+        # storm_code -1 (missing name) indexes the trailing None
+        names = np.asarray(meta["categories"]["storm_code"] + [None], dtype=object)
+        _SHARED_TRACKS.clear()
+        _SHARED_TRACKS.update(
+            version=meta["version"],
+            lat=arrays["HurLat"],
+            lon=arrays["HurLon"],
+            wind=arrays["wind_speed"],
+            storm=names[arrays["storm_code"]],
+        )
+    return _SHARED_TRACKS
+
+
+def risk_chunk_rows(loc_ids, loc_lat, loc_lon, rows, radius, meta):
+    """
+    `risk_chunk` for a band given as hurr2 row numbers: the track values are
+    read from the memory-mapped export described by `meta` instead of being
+    pickled to the worker with every chunk.
+    """
+    tracks = _shared_tracks(meta)
+    return risk_chunk(
+        loc_ids, loc_lat, loc_lon,
+        tracks["lat"][rows], tracks["lon"][rows], tracks["wind"][rows], tracks["storm"][rows],
+        radius,
+    )
+
+
+def assemble_risk(df_exposures: pd.DataFrame, results) -> tuple[pd.DataFrame, ImpactMatrix]:
+    """Merge chunk results into an `exposures_risk` shaped frame and the sparse impact matrix."""
+    results = list(results)
+    at_risk = np.concatenate([r[0] for r in results]) if results else np.array([])
+    df_exposures_risk = df_exposures.copy()
+    df_exposures_risk["is_at_risk"] = df_exposures_risk["Location"].isin(at_risk)
+
+    hits = [r[1] for r in results]
+    impact = ImpactMatrix.from_triplets(
+        np.concatenate([h[0] for h in hits]) if hits else np.array([]),
+        np.concatenate([h[1] for h in hits]) if hits else np.array([], dtype=object),
+        np.concatenate([h[2] for h in hits]) if hits else np.array([]),
+        locations=df_exposures["Location"].unique(),
+    )
+    return df_exposures_risk, impact
+
+
+def compute_exposure_risk(
+    df_exposures: pd.DataFrame,
+    df_hurr: pd.DataFrame,
+    radius: float = AT_RISK_DEGREES,
+    storm_col: str = "storm_name",
+):
+    """
+    Same results as the cartesian join in management_request_2_integrate.py,
+    without materializing it: `is_at_risk` per exposure row plus the sparse
+    Location x storm max-wind matrix (`impact.to_frame()` is exposures_loc_storm_wind).
+    `storm_col` sets what the matrix columns are keyed by, e.g. a per-season event id.
+    """
+    tracks = prepare_tracks(df_hurr, storm_col)
+    chunks = iter_chunks(unique_locations(df_exposures), tracks, radius)
+    return assemble_risk(df_exposures, (risk_chunk(*args) for args in chunks))
+
+
+class RiskJob:
+    """A risk recompute running on an executor, one future per location chunk."""
+
+    def __init__(
+        self,
+        executor,
+        df_exposures: pd.DataFrame,
+        df_hurr: pd.DataFrame,
+        radius: float = AT_RISK_DEGREES,
+        source_rows: bool = False,
+    ):
+        """
+        With `source_rows`, `df_hurr` is (a row subset of) the hurr2 CSV with its
+        original index; workers then read the tracks from the `mmap_store` export
+        and only row numbers are sent per chunk. Falls back to sending the track
+        arrays when the export is missing or older than the CSV.
+        """
+        self.df_exposures = df_exposures
+        tracks = prepare_tracks(df_hurr)
+        df_locs = unique_locations(df_exposures)
+        if source_rows and not is_stale("hurr2"):
+            meta = read_meta("hurr2")
+            self.futures = [
+                executor.submit(risk_chunk_rows, *args, meta)
+                for args in iter_chunk_rows(df_locs, tracks, radius)
+            ]
+        else:
+            self.futures = [
+                executor.submit(risk_chunk, *args)
+                for args in iter_chunks(df_locs, tracks, radius)
+            ]
+        self._result = None
+
+    def progress(self) -> float:
+        if not self.futures:
+            return 1.0
+        return sum(f.done() for f in self.futures) / len(self.futures)
+
+    def done(self) -> bool:
+        return all(f.done() for f in self.futures)
+
+    def cancel(self):
+        """Cancel the chunks that have not started; running ones finish and are discarded."""
+        for f in self.futures:
+            f.cancel()
+
+    def result(self) -> tuple[pd.DataFrame, ImpactMatrix]:
+        """Block until every chunk is finished and return the assembled frames."""
+        if self._result is None:
+            self._result = assemble_risk(self.df_exposures, (f.result() for f in self.futures))
+        return self._result
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from distance_index import pml_category as categorize_pml
+
+RISK_PATHS = ["cleaned_data/exposures_pml.csv", "cleaned_data/exposures_risk.csv"]
+LOC_STORM_PATH = "cleaned_data/exposures_loc_storm_wind.csv"
+
+
+class RiskIndex:
+    """
+    In-memory lookup structures over the risk outputs, built once at startup:
+    a dict keyed by Location and latitude-sorted coordinate arrays for boxes.
+    """
+
+    def __init__(self, df_risk: pd.DataFrame, df_loc_storm: pd.DataFrame):
+        df_latest = (
+            df_risk.sort_values("PolicyYear", kind="stable")
+            .drop_duplicates("Location", keep="last")
+            .sort_values("Latitude", kind="stable")
+            .reset_index(drop=True)
+        )
+        storms = {
+            loc: [
+                {"storm_name": name, "max_wind": float(wind)}
+                for name, wind in zip(group["storm_name"], group["MaxWindAtLocation"])
+            ]
+            for loc, group in df_loc_storm.groupby("Location")
+        }
+
+        self.records = {}
+        for row in df_latest.to_dict("records"):
+            loc = int(row["Location"])
+            loc_storms = storms.get(loc, [])
+            max_wind = row.get("MaxWindNearLocation")
+            pml_category = row.get("PML_Category")
+            if max_wind is None:
+                max_wind = max((s["max_wind"] for s in loc_storms), default=0.0)
+            if pml_category is None or pd.isna(pml_category):
+                # exposures_risk.csv fallback: same tiers as categorize_pml() in the integrate script
+                pml_category = categorize_pml(row["TotalInsuredValue"], row["is_at_risk"], max_wind).item()
+            self.records[loc] = {
+                "Location": loc,
+                "Latitude": float(row["Latitude"]),
+                "Longitude": float(row["Longitude"]),
+                "PolicyYear": int(row["PolicyYear"]),
+                "TotalInsuredValue": float(row["TotalInsuredValue"]),
+                "is_at_risk": bool(row["is_at_risk"]),
+                "MaxWindNearLocation": float(max_wind),
+                "PML_Category": pml_category,
+                "storms": loc_storms,
+            }
+
+        self.lat = df_latest["Latitude"].to_numpy(dtype=float)
+        self.lon = df_latest["Longitude"].to_numpy(dtype=float)
+        self.loc_ids = df_latest["Location"].to_numpy(dtype=int)
+
+    def lookup(self, location: int):
+        return self.records.get(int(location))
+
+    def bbox(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> list:
+        lo = np.searchsorted(self.lat, min_lat, side="left")
+        hi = np.searchsorted(self.lat, max_lat, side="right")
+        lon = self.lon[lo:hi]
+        ids = self.loc_ids[lo:hi][(lon >= min_lon) & (lon <= max_lon)]
+        return [self.records[int(i)] for i in ids]
+
+
+class ServiceStats:
+    """Thread-safe per-endpoint request counters and a rolling latency window."""
+
+    def __init__(self, window: int = 10_000):
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            latencies_ms = np.array(self.latencies) * 1000
+            total = sum(self.counts.values())
+            counts = dict(self.counts)
+            errors = self.errors
+        uptime = time.perf_counter() - self.started
+        summary = {
+            "requests": total,
+            "errors": errors,
+            "by_endpoint": counts,
+            "uptime_s": round(uptime, 3),
+            "throughput_rps": round(total / uptime, 3) if uptime > 0 else 0.0,
+        }
+        if len(latencies_ms):
+            p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+            summary.update(latency_ms_p50=round(p50, 3), latency_ms_p95=round(p95, 3),
+                           latency_ms_p99=round(p99, 3), latency_ms_max=round(latencies_ms.max(), 3))
+        return summary
+
+
+def load_index() -> RiskIndex:
+    risk_path = next(p for p in RISK_PATHS if os.path.exists(p))
+    return RiskIndex(pd.read_csv(risk_path), pd.read_csv(LOC_STORM_PATH))
+
+
+def run_query(index: RiskIndex, query: dict):
+    """A single batch item: {"location": id} or {"bbox": [min_lat, max_lat, min_lon, max_lon]}."""
+    if "location" in query:
+        return index.lookup(query["location"])
+    if "bbox" in query:
+        return index.bbox(*map(float, query["bbox"]))
+    raise ValueError(f"unknown query: {query}")
+
+
+class RiskRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /location/<id>
+    GET  /bbox?min_lat=..&max_lat=..&min_lon=..&max_lon=..
+    POST /batch   {"queries": [{"location": 3}, {"bbox": [18, 20, -101, -99]}]}
+    GET  /stats
+    """
+
+    index: RiskIndex = None
+    stats: ServiceStats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self, endpoint: str, handler):
+        start = time.perf_counter()
+        try:
+            status, payload = handler()
+        except (ValueError, KeyError, TypeError) as exc:
+            status, payload = 400, {"error": str(exc)}
+        self.send_json(status, payload)
+        self.stats.record(endpoint, time.perf_counter() - start, status < 400)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+
+        if parts[0] == "location" and len(parts) == 2:
+            def handler():
+                record = self.index.lookup(int(parts[1]))
+                return (200, record) if record else (404, {"error": f"unknown Location {parts[1]}"})
+            self.handle_request("location", handler)
+        elif parts[0] == "bbox":
+            def handler():
+                params = {k: float(v[0]) for k, v in parse_qs(url.query).items()}
+                return 200, self.index.bbox(params["min_lat"], params["max_lat"],
+                                            params["min_lon"], params["max_lon"])
+            self.handle_request("bbox", handler)
+        elif parts[0] == "stats":
+            self.send_json(200, self.stats.snapshot())
+        else:
+            self.send_json(404, {"error": f"unknown path {url.path}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path.strip("/") != "batch":
+            self.send_json(404, {"error": f"unknown path {self.path}"})
+            return
+
+        def handler():
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            return 200, [run_query(self.index, q) for q in body["queries"]]
+        self.handle_request("batch", handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON query service over exposure risk.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    RiskRequestHandler.index = load_index()
+    RiskRequestHandler.stats = ServiceStats()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), RiskRequestHandler)
+    print(f"Serving {len(RiskRequestHandler.index.records)} locations on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import json
+import random
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def fetch(base_url: str, path: str, payload=None):
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(base_url + path, data=data,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as resp:
+        return json.loads(resp.read())
+
+
+def make_request(base_url: str, locations: list, rng: random.Random) -> float:
+    """Fire one randomly chosen query and return its round-trip time in seconds."""
+    kind = rng.random()
+    start = time.perf_counter()
+    if kind < 0.6:
+        fetch(base_url, f"/location/{rng.choice(locations)}")
+    elif kind < 0.9:
+        lat, lon = rng.uniform(10, 40), rng.uniform(-110, -60)
+        fetch(base_url, f"/bbox?min_lat={lat}&max_lat={lat + 5}&min_lon={lon}&max_lon={lon + 5}")
+    else:
+        queries = [{"location": rng.choice(locations)} for _ in range(20)]
+        fetch(base_url, "/batch", {"queries": queries})
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for risk_service.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    locations = sorted({r["Location"] for r in fetch(args.url, "/bbox?min_lat=-90&max_lat=90&min_lon=-180&max_lon=180")})
+    rngs = [random.Random(i) for i in range(args.requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = np.array(list(pool.map(lambda rng: make_request(args.url, locations, rng), rngs)))
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    print(f"Requests: {args.requests} | Concurrency: {args.concurrency} | Elapsed: {elapsed:.2f}s")
+    print(f"Throughput: {args.requests / elapsed:,.1f} req/s")
+    print(f"Client latency ms  p50={p50:.2f}  p95={p95:.2f}  p99={p99:.2f}")
+    print("Server stats:", fetch(args.url, "/stats"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from exceedance_curves import storm_events
+from impact_matrix import IMPACT_MATRIX_PATH, ImpactMatrix
+from risk_engine import AT_RISK_DEGREES, compute_exposure_risk, unique_locations
+
+STATE_PATH = "cleaned_data/season_state.json"
+
+# Track columns that identify an event's contents; any change re-evaluates the whole event.
+TRACK_COLS = {"storm_name": str, "date": str, "HurLon": float, "HurLat": float, "wind_speed": float}
+
+
+def _row_hashes(df: pd.DataFrame, dtypes: dict) -> np.ndarray:
+    # Normalize dtypes first so e.g. an int column read back as float hashes the same.
+    return pd.util.hash_pandas_object(df[list(dtypes)].astype(dtypes), index=False).to_numpy()
+
+
+def event_keys(df_hurr: pd.DataFrame) -> pd.Series:
+    """
+    The storm event of each track point: the "<storm_name> <season>" id of
+    exceedance_curves.storm_events(), since names are reused across seasons.
+    Named points whose date does not parse fall back to the bare storm_name;
+    unnamed points get NaN.
+    """
+    keys = df_hurr["storm_name"].astype(object)
+    events = storm_events(df_hurr)["event_id"]
+    keys.loc[events.index] = events.astype(object)
+    return keys
+
+
+def event_storm_names(df_hurr: pd.DataFrame, keys: pd.Series = None) -> pd.Series:
+    """event key -> storm_name, for collapsing an event-keyed ImpactMatrix with `relabel`."""
+    keys = event_keys(df_hurr) if keys is None else keys
+    named = keys.notna()
+    return pd.Series(df_hurr.loc[named, "storm_name"].to_numpy(dtype=object),
+                     index=keys[named].to_numpy(dtype=object)).groupby(level=0).first()
+
+
+def event_fingerprints(df_hurr: pd.DataFrame, keys: pd.Series = None) -> pd.Series:
+    """One uint64 per event key: the wrapping sum of its track-point hashes (row-order independent)."""
+    keys = event_keys(df_hurr) if keys is None else keys
+    named = keys.notna().to_numpy()
+    codes, events = pd.factorize(keys[named])
+    sums = np.zeros(len(events), dtype=np.uint64)
+    np.add.at(sums, codes, _row_hashes(df_hurr[named], TRACK_COLS))
+    return pd.Series(sums, index=pd.Index(events, name="event"))
+
+
+def locations_fingerprint(df_exposures: pd.DataFrame) -> str:
+    """Hash of the portfolio's coordinates; risk does not depend on TIV, premium or policy year."""
+    df_locs = unique_locations(df_exposures).sort_values("Location")
+    hashes = _row_hashes(df_locs, {"Location": str, "Latitude": float, "Longitude": float})
+    return format(int(hashes.sum(dtype=np.uint64)), "016x")
+
+
+def load_state(path: str = STATE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state: dict, path: str = STATE_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def diff_events(fingerprints: pd.Series, state: dict):
+    """Event keys that are new or changed since `state`, and those no longer present."""
+    current = pd.Series([format(int(v), "016x") for v in fingerprints.to_numpy()], index=fingerprints.index)
+    previous = pd.Series(state["events"], dtype=object)
+    changed = current.index[current.ne(previous.reindex(current.index))]
+    removed = previous.index.difference(current.index)
+    return changed, removed, current
+
+
+def merge_impact(impact: ImpactMatrix, impact_delta: ImpactMatrix, stale, locations) -> ImpactMatrix:
+    """Drop the stale events' columns from `impact` and add the re-evaluated ones."""
+    df_old = impact.to_frame()
+    frames = [df for df in (df_old[~df_old["storm_name"].isin(stale)], impact_delta.to_frame()) if len(df)]
+    if not frames:
+        return ImpactMatrix.from_triplets(np.array([]), np.array([], dtype=object), np.array([]), locations)
+    df = pd.concat(frames, ignore_index=True)
+    return ImpactMatrix.from_triplets(df["Location"].to_numpy(), df["storm_name"].to_numpy(dtype=object),
+                                      df["MaxWindAtLocation"].to_numpy(), locations)
+
+
+def update_risk(
+    df_exposures: pd.DataFrame,
+    df_hurr: pd.DataFrame,
+    incremental: bool = True,
+    radius: float = AT_RISK_DEGREES,
+    state_path: str = STATE_PATH,
+    impact_path: str = IMPACT_MATRIX_PATH,
+):
+    """
+    compute_exposure_risk() over all seasons, but only evaluating storm events
+    (storm_name, season) that are new or changed since the last run; the rest
+    come from the saved impact matrix. Appending a season therefore costs time
+    proportional to its own track points, even when it reuses earlier names.
+
+    Falls back to a full evaluation when there is no previous run, or the portfolio
+    coordinates or radius changed. Track points without a storm_name cannot be
+    attributed to an event and are always re-evaluated. Saves the event-keyed
+    impact matrix and fingerprints; returns (df_exposures_risk, event-keyed impact,
+    evaluated event keys). Collapse the matrix to storm names with
+    `impact.relabel(event_storm_names(df_hurr))`.
+    """
+    keys = event_keys(df_hurr)
+    fingerprints = event_fingerprints(df_hurr, keys)
+    loc_key = locations_fingerprint(df_exposures)
+    state = load_state(state_path) if incremental else None
+    incremental = (
+        state is not None
+        and "events" in state
+        and state.get("radius") == radius
+        and state.get("locations") == loc_key
+        and os.path.exists(impact_path)
+    )
+
+    if incremental:
+        changed, removed, current = diff_events(fingerprints, state)
+    else:
+        _, removed, current = diff_events(fingerprints, {"events": {}})
+        changed = current.index
+
+    df_delta = df_hurr[keys.isin(changed) | keys.isna()].assign(event=keys)
+    df_delta_risk, impact_delta = compute_exposure_risk(df_exposures, df_delta, radius, storm_col="event")
+
+    if incremental:
+        impact = merge_impact(ImpactMatrix.load(impact_path), impact_delta, changed.union(removed),
+                              df_exposures["Location"].unique())
+    else:
+        impact = impact_delta
+
+    df_exposures_risk = df_exposures.copy()
+    df_exposures_risk["is_at_risk"] = (
+        df_exposures_risk["Location"].isin(impact.at_risk_locations()).to_numpy()
+        | df_delta_risk["is_at_risk"].to_numpy()
+    )
+
+    impact.save(impact_path)
+    save_state({"radius": radius, "locations": loc_key, "events": current.to_dict()}, state_path)
+    return df_exposures_risk, impact, changed
@@ -0,0 +1,243 @@
+import argparse
+import os
+
+import duckdb
+import pandas as pd
+
+DB_PATH = "cleaned_data/cas_case.duckdb"
+# Spill directory for joins / aggregations that do not fit in memory_limit.
+TEMP_DIR = "cleaned_data/duckdb_tmp"
+MEMORY_LIMIT = "2GB"
+
+# Table -> (source CSV, column types, sort key, indexed columns).
+# Only the listed columns are typed explicitly; any others are named from the
+# header and auto-detected. Rows are stored sorted by the sort key so DuckDB's
+# min/max zone maps skip row groups on range filters; ART indexes serve point
+# lookups on the keys.
+TABLES = {
+    "exposures": (
+        "cleaned_data/exposures_cleaned.csv",
+        {
+            "Location": "INTEGER", "Latitude": "DOUBLE", "Longitude": "DOUBLE",
+            "TotalInsuredValue": "DOUBLE", "Premium": "DOUBLE", "NonCatLoss": "DOUBLE", "PolicyYear": "INTEGER",
+        },
+        "PolicyYear, Location",
+        ["Location", "PolicyYear"],
+    ),
+    "hurr1": (
+        "cleaned_data/hurr1_cleaned.csv",
+        {
+            "SID": "VARCHAR", "SEASON": "INTEGER", "NUMBER": "INTEGER", "BASIN": "VARCHAR", "SUBBASIN": "VARCHAR",
+            "NAME": "VARCHAR", "ISO_TIME": "TIMESTAMP", "NATURE": "VARCHAR", "LAT": "DOUBLE", "LON": "DOUBLE",
+            "WMO_WIND": "INTEGER", "WMO_PRES": "INTEGER", "WMO_AGENCY": "VARCHAR", "TRACK_TYPE": "VARCHAR",
+            "DIST2LAND": "INTEGER",
+        },
+        "ISO_TIME",
+        ["SID", "NAME"],
+    ),
+    "hurr2": (
+        "cleaned_data/hurr2_merged_with_h1_wind.csv",
+        {
+            "storm_name": "VARCHAR", "date": "TIMESTAMP", "HurLon": "DOUBLE", "HurLat": "DOUBLE",
+            "wind_speed": "INTEGER", "wind_radius": "DOUBLE", "storm_area_mi2": "DOUBLE",
+        },
+        "HurLat",
+        ["storm_name"],
+    ),
+    "exposures_risk": (
+        "cleaned_data/exposures_risk.csv",
+        {
+            "Location": "INTEGER", "Latitude": "DOUBLE", "Longitude": "DOUBLE",
+            "TotalInsuredValue": "DOUBLE", "Premium": "DOUBLE", "NonCatLoss": "DOUBLE", "PolicyYear": "INTEGER",
+            "is_at_risk": "BOOLEAN",
+        },
+        "PolicyYear, Location",
+        ["Location"],
+    ),
+    "loc_storm_wind": (
+        "cleaned_data/exposures_loc_storm_wind.csv",
+        {"Location": "INTEGER", "storm_name": "VARCHAR", "MaxWindAtLocation": "INTEGER"},
+        "Location, storm_name",
+        ["Location", "storm_name"],
+    ),
+}
+
+# The +-1 degree box join of management_request_2_integrate.py, max wind per (Location, storm).
+# The BETWEEN bounds are slightly wider so DuckDB can plan a range join; abs() keeps the exact rule.
+_LOC_STORM_CTE = """
+    locs AS (SELECT DISTINCT Location, Latitude, Longitude FROM exposures),
+    loc_storm AS (
+        SELECT l.Location, h.storm_name, max(h.wind_speed) AS MaxWindAtLocation
+        FROM locs l JOIN hurr2 h
+          ON h.HurLat BETWEEN l.Latitude - 1.001 AND l.Latitude + 1.001
+         AND h.HurLon BETWEEN l.Longitude - 1.001 AND l.Longitude + 1.001
+        WHERE abs(l.Latitude - h.HurLat) <= 1.0 AND abs(l.Longitude - h.HurLon) <= 1.0
+          AND h.storm_name IS NOT NULL
+        GROUP BY l.Location, h.storm_name
+    )
+"""
+
+# The existing scripts' outputs as named queries; each lists the script it reproduces.
+# Output columns and row order match the CSVs those scripts write.
+QUERIES = {
+    # hurr1_task.py -> storm_count_by_year_type.csv
+    "storm_count_by_year_type": """
+        SELECT SEASON, NATURE, count(DISTINCT SID) AS StormCount
+        FROM hurr1
+        GROUP BY SEASON, NATURE
+        ORDER BY SEASON, NATURE
+    """,
+    # hurr1_task.py -> max_wind_per_storm.csv
+    "max_wind_per_storm": """
+        SELECT SID, max(WMO_WIND) AS MaxWind
+        FROM hurr1
+        GROUP BY SID
+        ORDER BY SID
+    """,
+    # hurr2_task.py -> hurr2_storm_area.csv
+    "hurr2_storm_area": """
+        SELECT storm_name, avg(storm_area_mi2) AS avg_area_mi2
+        FROM hurr2
+        GROUP BY storm_name
+        ORDER BY storm_name
+    """,
+    # hurr2_task.py / management_request_2_integrate.py -> hurr_wind_reconciliation.csv
+    "hurr_wind_reconciliation": """
+        WITH h1 AS (SELECT NAME, max(WMO_WIND) AS max_wind_h1 FROM hurr1 GROUP BY NAME),
+             h2 AS (SELECT storm_name, max(wind_speed) AS max_wind_h2 FROM hurr2 GROUP BY storm_name)
+        SELECT h1.NAME, h1.max_wind_h1, h2.storm_name, h2.max_wind_h2,
+               h1.max_wind_h1 - h2.max_wind_h2 AS wind_diff
+        FROM h1 JOIN h2 ON h1.NAME = h2.storm_name
+        ORDER BY h1.NAME
+    """,
+    # management_request_1.py -> exposures_summary_by_year.csv
+    "exposures_summary_by_year": """
+        SELECT PolicyYear,
+               sum(TotalInsuredValue) AS TotalInsuredValue,
+               sum(Premium) AS Premium,
+               sum(NonCatLoss) AS NonCatLoss,
+               sum(NonCatLoss) / sum(Premium) AS LossRatio,
+               sum(NonCatLoss) / sum(TotalInsuredValue) AS LossCost,
+               100 * sum(Premium) / sum(TotalInsuredValue) AS Premium_per_100_TIV
+        FROM exposures
+        GROUP BY PolicyYear
+        ORDER BY PolicyYear
+    """,
+    # management_request_2_integrate.py -> exposures_loc_storm_wind.csv
+    "exposures_loc_storm_wind": f"""
+        WITH {_LOC_STORM_CTE}
+        SELECT * FROM loc_storm ORDER BY Location, storm_name
+    """,
+    # management_request_2_integrate.py -> hurr_impact_summary.csv
+    "hurr_impact_summary": f"""
+        WITH {_LOC_STORM_CTE}
+        SELECT storm_name, max(MaxWindAtLocation) AS MaxWind_AtRisk
+        FROM loc_storm
+        GROUP BY storm_name
+        ORDER BY storm_name
+    """,
+    # management_request_2_integrate.py -> total vs at-risk TIV
+    "tiv_at_risk": """
+        SELECT sum(TotalInsuredValue) AS tiv_total,
+               sum(TotalInsuredValue) FILTER (WHERE is_at_risk) AS tiv_at_risk,
+               sum(TotalInsuredValue) FILTER (WHERE is_at_risk) / sum(TotalInsuredValue) AS ratio
+        FROM exposures_risk
+    """,
+    # management_request_2_integrate.py -> PML summary (High/Medium/Low)
+    "pml_summary": f"""
+        WITH {_LOC_STORM_CTE},
+             wind AS (SELECT Location, max(MaxWindAtLocation) AS MaxWindNearLocation
+                      FROM loc_storm GROUP BY Location),
+             pml AS (
+                SELECT r.TotalInsuredValue,
+                       CASE
+                           WHEN r.TotalInsuredValue > 500000 AND r.is_at_risk
+                                AND coalesce(w.MaxWindNearLocation, 0) >= 64 THEN 'High'
+                           WHEN r.TotalInsuredValue > 100000 OR coalesce(w.MaxWindNearLocation, 0) >= 50 THEN 'Medium'
+                           ELSE 'Low'
+                       END AS PML_Category
+                FROM exposures_risk r LEFT JOIN wind w USING (Location)
+             )
+        SELECT PML_Category, sum(TotalInsuredValue) AS TIV_Sum
+        FROM pml
+        GROUP BY PML_Category
+        ORDER BY PML_Category
+    """,
+    # Per-location experience by year (not written by any script yet)
+    "loss_ratio_by_location_year": """
+        SELECT Location, PolicyYear, sum(NonCatLoss) / sum(Premium) AS LossRatio
+        FROM exposures
+        GROUP BY Location, PolicyYear
+        ORDER BY Location, PolicyYear
+    """,
+}
+
+
+def connect(path: str = DB_PATH, read_only: bool = False, threads: int = None):
+    """Open the local database with spilling to disk enabled and all cores (or `threads`) in use."""
+    con = duckdb.connect(path, read_only=read_only)
+    # Read-only connections run the queries, so they need the spill directory too.
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    con.execute(f"SET temp_directory = '{TEMP_DIR}'")
+    con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+    con.execute(f"SET threads = {threads or os.cpu_count() or 1}")
+    return con
+
+
+def build_database(con, tables: dict = TABLES):
+    """(Re)load every table whose CSV exists, typed and sorted, then create its indexes."""
+    loaded = []
+    for name, (csv_path, types, sort_key, index_cols) in tables.items():
+        if not os.path.exists(csv_path):
+            print(f"跳过 {name}: 找不到 {csv_path}")
+            continue
+        con.execute(
+            f"CREATE OR REPLACE TABLE {name} AS "
+            f"SELECT * FROM read_csv(?, header = true, types = ?, nullstr = [' ', '']) "
+            f"ORDER BY {sort_key}",
+            [csv_path, types],
+        )
+        for col in index_cols:
+            con.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_{col} ON {name} ({col})")
+        loaded.append(name)
+    return loaded
+
+
+def run_query(name: str, con=None) -> pd.DataFrame:
+    """Run one of the named QUERIES and return it as a DataFrame."""
+    if con is None:
+        with connect(read_only=True) as con:
+            return con.execute(QUERIES[name]).df()
+    return con.execute(QUERIES[name]).df()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local DuckDB layer over the cleaned datasets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="load cleaned_data/*.csv into the database")
+    sub.add_parser("list", help="list named queries")
+    query = sub.add_parser("query", help="run a named query")
+    query.add_argument("name", choices=sorted(QUERIES))
+    query.add_argument("--out", help="write the result to this CSV")
+    sql = sub.add_parser("sql", help="run ad-hoc SQL")
+    sql.add_argument("statement")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        with connect() as con:
+            loaded = build_database(con)
+        print(f"已载入 {loaded} -> {DB_PATH}")
+    elif args.command == "list":
+        print("\n".join(sorted(QUERIES)))
+    elif args.command == "query":
+        df = run_query(args.name)
+        if args.out:
+            df.to_csv(args.out, index=False)
+        print(df)
+    else:
+        with connect(read_only=True) as con:
+            print(con.execute(args.statement).df())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+HURR1_INDEX_PATH = "cleaned_data/hurr1_time_index.npz"
+HURR2_INDEX_PATH = "cleaned_data/hurr2_time_index.npz"
+
+# Atlantic / Eastern Pacific hurricane season, as (start month, end month) inclusive.
+HURRICANE_SEASON = (6, 11)
+
+
+def source_stamp(df: pd.DataFrame, time_col: str, storm_col: str, wind_col: str, source_path: str = None) -> str:
+    """
+    What an index was built from, to tell whether a saved one still matches: the
+    size/mtime of `source_path` when `df` was read straight from that file (no
+    pass over the data), else a hash of the time/storm/wind columns in row order.
+    """
+    if source_path is not None:
+        stat = os.stat(source_path)
+        return f"file:{source_path}:{stat.st_size}:{stat.st_mtime_ns}"
+    row_hashes = pd.util.hash_pandas_object(df[[time_col, storm_col, wind_col]], index=False)
+    return "sha1:" + hashlib.sha1(row_hashes.to_numpy().tobytes()).hexdigest()
+
+
+def _year_start_ns(years) -> np.ndarray:
+    return pd.to_datetime({"year": np.asarray(years), "month": 1, "day": 1}).to_numpy("datetime64[ns]").view("i8")
+
+
+class TrackTimeIndex:
+    """
+    Track points sorted by parsed timestamp, built once at ingestion.
+
+    `rows` are positions into the source frame (in CSV row order) so any slice
+    can be turned back into rows with `df.iloc[...]`. Points whose timestamp
+    does not parse are left out. A second ordering groups named rows by storm,
+    with `storm_offsets` marking where each storm starts.
+    """
+
+    FIELDS = ("times", "rows", "wind", "storm_names", "storm_offsets", "storm_rows", "n_rows", "source_stamp")
+
+    def __init__(self, times, rows, wind, storm_names, storm_offsets, storm_rows, n_rows, source_stamp=""):
+        self.times = times
+        self.rows = rows
+        self.wind = wind
+        self.storm_names = storm_names
+        self.storm_offsets = storm_offsets
+        self.storm_rows = storm_rows
+        self.n_rows = int(n_rows)
+        self.source_stamp = str(source_stamp)
+        self._storm_lookup = {name: i for i, name in enumerate(storm_names)}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, time_col: str, storm_col: str, wind_col: str, source_path: str = None):
+        times = pd.to_datetime(df[time_col], errors="coerce").to_numpy("datetime64[ns]").view("i8")
+        valid = np.flatnonzero(times != np.iinfo(np.int64).min)
+
+        order = valid[np.argsort(times[valid], kind="stable")]
+        storm_codes, storm_names = pd.factorize(df[storm_col].to_numpy()[valid], sort=True)
+        named = storm_codes >= 0
+        by_storm = np.lexsort((times[valid][named], storm_codes[named]))
+        storm_offsets = np.r_[0, np.cumsum(np.bincount(storm_codes[named], minlength=len(storm_names)))]
+
+        return cls(
+            times=times[order],
+            rows=order,
+            wind=df[wind_col].to_numpy(dtype=float)[order],
+            storm_names=np.asarray(storm_names, dtype=str),
+            storm_offsets=storm_offsets,
+            storm_rows=valid[named][by_storm],
+            n_rows=len(df),
+            source_stamp=source_stamp(df, time_col, storm_col, wind_col, source_path),
+        )
+
+    def save(self, path: str):
+        # Written under a temporary name and swapped in, so concurrent loaders never read a partial file.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **{key: getattr(self, key) for key in self.FIELDS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            # Files saved by older versions may lack or carry extra fields; a missing stamp forces a rebuild.
+            return cls(**{key: data[key] for key in cls.FIELDS if key in data.files})
+
+    # ---- slices ----
+
+    def range_positions(self, start, end) -> slice:
+        """Positions in time order for start <= t < end (anything pd.Timestamp accepts)."""
+        lo = np.searchsorted(self.times, pd.Timestamp(start).value, side="left")
+        hi = np.searchsorted(self.times, pd.Timestamp(end).value, side="left")
+        return slice(lo, hi)
+
+    def range_rows(self, start, end) -> np.ndarray:
+        return np.sort(self.rows[self.range_positions(start, end)])
+
+    def years(self) -> np.ndarray:
+        if not len(self.times):
+            return np.array([], dtype=int)
+        first, last = pd.to_datetime(self.times[[0, -1]]).year
+        return np.arange(first, last + 1)
+
+    def year_rows(self, years) -> np.ndarray:
+        """Source rows for the given calendar years, in CSV order."""
+        years = np.asarray(sorted(years), dtype=int)
+        if not len(years):
+            return np.array([], dtype=int)
+        lo = np.searchsorted(self.times, _year_start_ns(years), side="left")
+        hi = np.searchsorted(self.times, _year_start_ns(years + 1), side="left")
+        return np.sort(np.concatenate([self.rows[a:b] for a, b in zip(lo, hi)]))
+
+    def season_rows(self, years=None, months=HURRICANE_SEASON) -> np.ndarray:
+        """Source rows falling inside `months` (inclusive) of each year."""
+        years = self.years() if years is None else np.asarray(sorted(years), dtype=int)
+        if not len(years):
+            return np.array([], dtype=int)
+        start_month, end_month = months
+        starts = pd.to_datetime({"year": years, "month": start_month, "day": 1})
+        ends = starts + pd.DateOffset(months=end_month - start_month + 1)
+        lo = np.searchsorted(self.times, starts.to_numpy("datetime64[ns]").view("i8"), side="left")
+        hi = np.searchsorted(self.times, ends.to_numpy("datetime64[ns]").view("i8"), side="left")
+        return np.sort(np.concatenate([self.rows[a:b] for a, b in zip(lo, hi)]))
+
+    def storm_rows_for(self, storm) -> np.ndarray:
+        """Source rows of one storm in time order."""
+        i = self._storm_lookup.get(storm)
+        if i is None:
+            return np.array([], dtype=int)
+        return self.storm_rows[self.storm_offsets[i]:self.storm_offsets[i + 1]]
+
+    # ---- summaries ----
+
+    def wind_by_year(self) -> pd.DataFrame:
+        """Mean wind speed per calendar year, computed from the year boundaries of the index."""
+        years = self.years()
+        if not len(years):
+            return pd.DataFrame({"year": years, "MeanWindSpeed": np.array([], dtype=float)})
+        bounds = np.searchsorted(self.times, _year_start_ns(np.r_[years, years[-1] + 1]), side="left")
+        starts = bounds[:-1]
+        has_wind = ~np.isnan(self.wind)
+        # reduceat returns the next element for an empty slice, so only reduce non-empty years.
+        nonempty = starts < bounds[1:]
+        sums = np.add.reduceat(np.where(has_wind, self.wind, 0.0), starts[nonempty])
+        counts = np.add.reduceat(has_wind.astype(np.int64), starts[nonempty])
+        keep = counts > 0
+        return pd.DataFrame({
+            "year": years[nonempty][keep],
+            "MeanWindSpeed": sums[keep] / counts[keep],
+        })
+
+
+def load_or_build(
+    df: pd.DataFrame,
+    path: str,
+    time_col: str,
+    storm_col: str,
+    wind_col: str,
+    source_path: str = None,
+) -> TrackTimeIndex:
+    """
+    Load the saved index, rebuilding and saving it if it is missing or was built
+    from different data than `df`. Pass `source_path` when `df` is that file as
+    read, so the check is a stat instead of a hash of the columns.
+    """
+    try:
+        index = TrackTimeIndex.load(path)
+        stamp = source_stamp(df, time_col, storm_col, wind_col, source_path)
+        if index.n_rows == len(df) and index.source_stamp == stamp:
+            return index
+    except FileNotFoundError:
+        pass
+    index = TrackTimeIndex.build(df, time_col, storm_col, wind_col, source_path)
+    index.save(path)
+    return index